@@ -0,0 +1,66 @@
+import math
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+from fastapi import Depends, HTTPException, Request, Security
+from fastapi.security import APIKeyHeader
+
+from app.models.clients import ClientConfig
+from app.services.client_manager import client_manager, current_client, QuotaExceeded
+from app.services.work_tracker import work_tracker, ClientDisconnected
+
+T = TypeVar("T")
+
+CLIENT_CLOSED_REQUEST = 499 # Non-standard status (nginx) for requests the client abandoned, only ever seen in logs
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False, description="API key of the client. Not required when no clients are configured")
+
+async def get_client(api_key: Optional[str] = Security(api_key_header)) -> ClientConfig:
+    """Authenticate the request and make its client the current client for the rest of the request."""
+    client = client_manager.authenticate(api_key)
+    if not client:
+        raise HTTPException(status_code=401, detail="Invalid or missing API key", headers={"WWW-Authenticate": "APIKey"})
+    current_client.set(client)
+    return client
+
+def too_many_requests(e: QuotaExceeded) -> HTTPException:
+    """429 response for a client over its token quota."""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+async def enforce_quota(client: ClientConfig = Depends(get_client)) -> ClientConfig:
+    """
+    Reject the analysis with 429 when the client is over its token quota. Each generation the analysis runs then
+    reserves its own cost, and raises QuotaExceeded if the client can't afford it.
+    """
+    try:
+        client_manager.admit(client)
+    except QuotaExceeded as e:
+        raise too_many_requests(e)
+    return client
+
+async def require_accepting():
+    """Refuse new analyses with 503 once the server is shutting down."""
+    if not work_tracker.accepting:
+        raise HTTPException(status_code=503, detail="Server is shutting down")
+
+async def _wait_for_disconnect(http_request: Request):
+    # The request body has already been read, so the next message is the disconnect
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
+
+async def cancel_on_disconnect(http_request: Request, work: Awaitable[T]) -> T:
+    """
+    Run the analysis, cancelling it and raising ClientDisconnected if the client disconnects first. Cancelling aborts
+    the Ollama generation, unless other requests coalesced onto the same generation are still waiting for it.
+    """
+    work_task = asyncio.ensure_future(work)
+    disconnect_task = asyncio.create_task(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({work_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect_task.cancel()
+        if not work_task.done():
+            work_task.cancel()
+            await asyncio.gather(work_task, return_exceptions=True)
+    if work_task.cancelled():
+        raise ClientDisconnected()
+    return work_task.result()
@@ -1,31 +1,123 @@
-from fastapi import APIRouter, HTTPException
+from typing import AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+import orjson
+import pydantic_core
 
+from app.core.serialization import FastJSONResponse
 from app.models.analysis import (
-    ApplicationType,
     AnalysisRequest,
-    AnalysisResponse
+    AnalysisResponse,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    CompositeAnalysisRequest,
+    CompositeAnalysisResponse
 )
+from app.models.work import WorkStats
+from app.api.dependencies import enforce_quota, require_accepting, cancel_on_disconnect, too_many_requests, CLIENT_CLOSED_REQUEST
 
-from app.services.argument_analyzer import argument_analyzer
+from app.services.analyzer_registry import analyzer_registry
+from app.services.analysis_pipeline import analysis_pipeline
+from app.services.work_tracker import work_tracker, ClientDisconnected
+from app.services.client_manager import QuotaExceeded
 
 analysis_router = APIRouter()
 
-@analysis_router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_text(request: AnalysisRequest):
+@analysis_router.post("/analyze", response_model=AnalysisResponse, dependencies=[Depends(require_accepting), Depends(enforce_quota)])
+async def analyze_text(request: AnalysisRequest, http_request: Request):
     """
     Route request to the correct analysis function. Currently supports the following applications:
 
     - argument_analysis: Analyze text for arguments and their credibility.
+    - sentiment_analysis: Assess the overall and aspect-level sentiment of text.
+    - summarization: Summarize text and list its key points.
+    - entity_extraction: Extract the named entities mentioned in text.
+
+    When no prompt_name is given, the first prompt defined for the application is used.
+    If the client disconnects before the analysis finishes, its generation is aborted.
+    """
+    analyzer = analyzer_registry.get(request.application)
+    if not analyzer:
+        raise HTTPException(status_code=400, detail="Invalid analysis type specified")
+    try:
+        async with work_tracker.track():
+            return FastJSONResponse(await cancel_on_disconnect(http_request, analyzer.analyze_text(
+                text=request.text,
+                model_name=request.model_name,
+                prompt_name=request.prompt_name,
+                generation_params=request.generation_params
+            )))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except QuotaExceeded as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+async def _stream_events(request: AnalysisRequest) -> AsyncIterator[bytes]:
+    """Encode analysis events as newline-delimited JSON."""
+    try:
+        async with work_tracker.track():
+            async for event, data in analyzer_registry.get(request.application).analyze_text_stream(
+                text=request.text,
+                model_name=request.model_name,
+                prompt_name=request.prompt_name,
+                generation_params=request.generation_params
+            ):
+                if event == "token":
+                    yield orjson.dumps({"event": "token", "data": data}) + b"\n"
+                else:
+                    yield b'{"event":"result","data":' + pydantic_core.to_json(data) + b"}\n"
+    except Exception as e:
+        yield orjson.dumps({"event": "error", "data": f"Analysis failed: {str(e)}"}) + b"\n"
+
+@analysis_router.post("/analyze/stream", dependencies=[Depends(require_accepting), Depends(enforce_quota)])
+async def analyze_text_stream(request: AnalysisRequest):
+    """
+    Streaming variant of /analyze. The response is newline-delimited JSON events:
+
+    - {"event": "token", "data": "..."} for every generated chunk
+    - {"event": "result", "data": AnalysisResponse} once the analysis completes
+    - {"event": "error", "data": "..."} if the analysis fails
+
+    Identical requests that are already in flight share one generation and receive the same token stream.
+    If the client disconnects, the stream is cancelled and its generation aborted.
+    """
+    if not analyzer_registry.get(request.application):
+        raise HTTPException(status_code=400, detail="Invalid analysis type specified")
+    return StreamingResponse(_stream_events(request), media_type="application/x-ndjson")
+
+@analysis_router.post("/analyze/composite", response_model=CompositeAnalysisResponse, dependencies=[Depends(require_accepting), Depends(enforce_quota)])
+async def analyze_text_composite(request: CompositeAnalysisRequest, http_request: Request):
+    """
+    Run several applications over the same text in one request. The text is preprocessed once and the applications
+    run concurrently. Each application has its own response and statistics in results, in request order, and an
+    application that fails doesn't fail the others.
     """
     try:
-        match request.application:
-            case ApplicationType.ARGUMENT_ANALYSIS:
-                return await argument_analyzer.analyze_text(
-                    text=request.text,
-                    model_name=request.model_name,
-                    prompt_name=request.prompt_name
-                )
-            case _:
-                raise HTTPException(status_code=400, detail="Invalid analysis type specified")
+        async with work_tracker.track():
+            return FastJSONResponse(await cancel_on_disconnect(http_request, analysis_pipeline.run(request)))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@analysis_router.post("/analyze/batch", response_model=BatchAnalysisResponse, dependencies=[Depends(require_accepting), Depends(enforce_quota)])
+async def analyze_text_batch(request: BatchAnalysisRequest, http_request: Request):
+    """
+    Run several independent analyses in one request, concurrently. Each analysis has its own response and statistics
+    in results, in request order, and an analysis that fails doesn't fail the others. If the client disconnects, every
+    analysis still running is aborted.
+    """
+    try:
+        async with work_tracker.track():
+            return FastJSONResponse(await cancel_on_disconnect(http_request, analysis_pipeline.run_batch(request)))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@analysis_router.get("/analyze/stats", response_model=WorkStats)
+async def get_work_stats():
+    """Counters of the analysis requests handled so far, including the tokens wasted on aborted generations."""
+    return work_tracker.get_stats()
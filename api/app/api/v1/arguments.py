@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+
+from app.models.argument_index import ArgumentSearchRequest, ArgumentSearchResponse
+from app.services.argument_index import argument_index
+
+arguments_router = APIRouter()
+
+@arguments_router.post("/arguments/search", response_model=ArgumentSearchResponse)
+async def search_arguments(request: ArgumentSearchRequest):
+    """
+    Search the arguments extracted by past analyses.
+
+    Supports full-text search over argument statements, supporting claims and qualifiers (query), similarity search
+    over argument embeddings (similar_to), or both. Results can be filtered by model, prompt, credibility and
+    confidence score ranges.
+    """
+    try:
+        return await argument_index.search(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Argument search failed: {str(e)}")
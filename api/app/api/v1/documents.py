@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi.responses import Response
+
+from app.core.serialization import FastJSONResponse
+from app.api.dependencies import get_client, enforce_quota, require_accepting, cancel_on_disconnect, CLIENT_CLOSED_REQUEST
+from app.models.clients import ClientConfig
+from app.models.documents import DocumentAnalysisRequest, DocumentAnalysisResponse, DocumentSession
+from app.services.document_sessions import document_sessions
+from app.services.work_tracker import work_tracker, ClientDisconnected
+
+documents_router = APIRouter()
+
+@documents_router.post("/documents/analyze", response_model=DocumentAnalysisResponse, dependencies=[Depends(require_accepting)])
+async def analyze_document(request: DocumentAnalysisRequest, http_request: Request, client: ClientConfig = Depends(enforce_quota)):
+    """
+    Analyze a revision of a document for arguments and their credibility.
+
+    The document is split into segments on paragraph breaks. Pass the session_id from the previous response with the
+    next revision: segments unchanged since then reuse their results and only new or changed segments are analyzed.
+    The response reports how much of the document was reused and the tokens spent on the segments analyzed.
+    """
+    if request.session_id and not document_sessions.get_session(request.session_id, client.client_id):
+        raise HTTPException(status_code=404, detail=f"Document session '{request.session_id}' not found")
+    try:
+        async with work_tracker.track():
+            return FastJSONResponse(await cancel_on_disconnect(http_request, document_sessions.analyze(request, client.client_id)))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@documents_router.get("/documents/{session_id}", response_model=DocumentSession)
+async def get_document_session(
+    session_id: str = Path(..., description="Document session to retrieve"),
+    client: ClientConfig = Depends(get_client)
+):
+    """Get the segments and per-segment results of the latest revision analyzed in a document session."""
+    session = document_sessions.get_session(session_id, client.client_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Document session '{session_id}' not found")
+    return FastJSONResponse(session)
+
+@documents_router.delete("/documents/{session_id}", response_model=bool)
+async def delete_document_session(
+    session_id: str = Path(..., description="Document session to delete"),
+    client: ClientConfig = Depends(get_client)
+):
+    """Delete a document session."""
+    try:
+        if not await document_sessions.delete_session(session_id, client.client_id):
+            raise HTTPException(status_code=404, detail=f"Document session '{session_id}' not found")
+        return True
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete document session: {str(e)}")
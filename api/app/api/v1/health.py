@@ -1,8 +1,13 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+
+from app.services.work_tracker import work_tracker
 
 health_check_router = APIRouter()
 
 @health_check_router.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint. Reports 503 while the server is draining for shutdown so load balancers stop routing to it."""
+    if not work_tracker.accepting:
+        return ORJSONResponse(status_code=503, content={"status": "draining", "service": "text-analysis-api"})
     return {"status": "healthy", "service": "text-analysis-api"} 
\ No newline at end of file
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path
 from typing import Dict, Any
 
+from app.api.dependencies import get_client, enforce_quota, require_accepting
 from app.services.ollama_manager import ollama_manager
-from app.models.llm_models import ModelsResponse, ModelInfo, ModelGenerationParams, ModelResetResponse
+from app.services.autotuner import autotuner
+from app.models.autotune import AutotuneJob, AutotuneRequest
+from app.models.clients import ClientConfig
+from app.models.llm_models import ModelsResponse, ModelInfo, ModelGenerationParams, ModelResetResponse, ModelInstanceCacheStats
 
 llm_models_router = APIRouter()
 
@@ -19,6 +23,31 @@ async def get_models():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get models: {str(e)}")
 
+@llm_models_router.get("/models/cache/stats", response_model=ModelInstanceCacheStats)
+async def get_model_instance_cache_stats():
+    """
+    Get statistics for the cache of LLM instances.
+
+    Instances are keyed on the model and its effective generation parameters, including per-request overrides.
+    """
+    return ollama_manager.get_instance_cache_stats()
+
+@llm_models_router.get("/models/autotune/{job_id}", response_model=AutotuneJob)
+async def get_autotune_job(
+    job_id: str = Path(..., description="Autotune job to retrieve"),
+    client: ClientConfig = Depends(get_client)
+):
+    """
+    Get the status and report of an autotune job.
+
+    The report lists every configuration benchmarked so far with its load time, time to first token, token rates and
+    parse success rate, and once the job has completed, the recommended configuration and whether it was applied.
+    """
+    job = autotuner.get_job(job_id, client.client_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Autotune job '{job_id}' not found")
+    return job
+
 @llm_models_router.get("/models/{model_name}", response_model=ModelInfo)
 async def get_model_configuration(
     model_name: str = Path(..., description="Name of the model to get configuration for")
@@ -96,3 +125,29 @@ async def reset_model_configuration(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reset model configuration: {str(e)}")
+
+@llm_models_router.post("/models/{model_name}/autotune", response_model=AutotuneJob, status_code=202, dependencies=[Depends(require_accepting)])
+async def autotune_model(
+    request: AutotuneRequest,
+    model_name: str = Path(..., description="Name of the model to tune"),
+    client: ClientConfig = Depends(enforce_quota)
+):
+    """
+    Start an autotune job for a model.
+
+    Benchmarks every combination of the grid's performance options (context length, CPU threads, GPU offload and
+    keep-alive) over a sample workload, and recommends the fastest configuration by the objective among those whose
+    output parses reliably. Unless apply is false, the recommended configuration is saved as the model's configuration.
+    The job runs in the background, poll GET /models/autotune/{job_id} for its report.
+    """
+    try:
+        if not await ollama_manager.is_model_available(model_name):
+            raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found")
+
+        return await autotuner.start(model_name, request, client.client_id)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start autotune job: {str(e)}")
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import get_client
+from app.models.clients import ClientConfig, UsageResponse
+from app.services.client_manager import client_manager
+
+usage_router = APIRouter()
+
+@usage_router.get("/usage", response_model=UsageResponse)
+async def get_usage(client: ClientConfig = Depends(get_client)):
+    """
+    Get token usage and throttling per client since the server started. Tokens are counted as prompt_eval_count plus
+    eval_count of every generation run for the client, including repairs and generations that were stopped early
+    or cancelled. Results served from the semantic cache or coalesced onto another client's generation are free.
+
+    Admin clients see every client, other clients only see themselves.
+    """
+    return UsageResponse(
+        authentication_enabled=client_manager.authentication_enabled,
+        clients=client_manager.get_usage(client)
+    )
@@ -16,6 +16,8 @@ class Settings(BaseSettings):
 
     # API settings
     api_prefix: str = "/api/v1"
+    clients_file: str = "clients.json" # API clients and their quotas (see clients.example.json). Authentication is disabled when there are none
+    shutdown_grace_period: float = 30.0 # Seconds to let in-flight analyses finish on shutdown before cancelling them
 
     # Dev settings
     debug: bool = True
@@ -23,6 +25,39 @@ class Settings(BaseSettings):
     # LLM model settings
     ollama_base_url: str = "http://localhost:11434"    
     langchain_verbose: bool = False
+    embedding_model: str = "nomic-embed-text"
+    early_stop_on_complete_json: bool = True # Stop generation when the model keeps writing after the streamed output contains a valid analysis result
+    max_concurrent_generations: int = 4 # Generations sent to Ollama at once across all requests, match OLLAMA_NUM_PARALLEL
+    repair_malformed_output: bool = True # Repair output that doesn't parse into a valid result instead of returning the fallback result
+    repair_with_model: bool = True # When local fixes fail, ask the model to repair its output with a short prompt
+    llm_instance_cache_size: int = 8 # Maximum number of LangChain LLM instances kept across models, context sizes and parameter overrides
+
+    # Context window settings
+    adaptive_context: bool = True # Size num_ctx per request from a pre-flight token estimate instead of the model's fixed context_length
+    context_buckets: List[int] = [2048, 4096, 8192, 16384] # Keep this set small, every distinct num_ctx is a model reload in Ollama
+    context_estimate_margin: float = 0.1 # Safety margin added to the prompt token estimate before picking a bucket
+
+    # Semantic cache settings
+    semantic_cache_enabled: bool = False # Reuse results for texts similar to ones already analyzed with the same prompt and model
+    semantic_cache_threshold: float = 0.97 # Minimum cosine similarity for a cached result to be returned
+    semantic_cache_capacity: int = 10000 # Maximum number of cached results, the least recently used is evicted
+    semantic_cache_dir: str = "semantic_cache"
+
+    # Argument index settings
+    argument_index_enabled: bool = False # Persist every successful analysis, including its text, and its arguments for later search
+    argument_index_embeddings: bool = True # Embed indexed arguments with embedding_model for similarity search
+    argument_index_dir: str = "argument_index"
+    argument_index_ivf_min_rows: int = 100000 # Build an approximate (IVF) vector index once this many arguments have embeddings, searches scan every vector below it
+    argument_index_ivf_probes: int = 32 # IVF lists scored per similarity search, more finds more of the true nearest neighbours but is slower
+
+    # Document session settings
+    document_sessions_dir: str = "document_sessions"
+    document_sessions_cache_size: int = 256 # Sessions kept in memory, the others are loaded from their file when used
+    document_segment_min_chars: int = 400 # Paragraphs at least this long are segments of their own, shorter ones are joined with the following ones into segments of about this length
+
+    # Autotune settings
+    autotune_reports_dir: str = "autotune_reports"
+    autotune_max_trials: int = 32 # Largest grid (number of configurations) an autotune job may sweep
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,30 @@
+from types import FrameType
+from typing import Optional
+import uvicorn
+from uvicorn.supervisors import ChangeReload
+
+from app.core.config import settings
+from app.services.work_tracker import work_tracker
+
+
+class GracefulServer(uvicorn.Server):
+    """
+    uvicorn server that stops admitting analyses as soon as it is asked to exit. uvicorn then stops accepting
+    connections, waits up to timeout_graceful_shutdown for the requests in flight and cancels what is left, which
+    aborts their Ollama generations.
+    """
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        work_tracker.stop_admitting()
+        super().handle_exit(sig, frame)
+
+def run(app: str, **kwargs):
+    """Run the app like uvicorn.run, with a GracefulServer and the configured shutdown grace period."""
+    config = uvicorn.Config(app, timeout_graceful_shutdown=settings.shutdown_grace_period, **kwargs)
+    server = GracefulServer(config)
+    try:
+        if config.should_reload:
+            ChangeReload(config, target=server.run, sockets=[config.bind_socket()]).run()
+        else:
+            server.run()
+    except KeyboardInterrupt:
+        pass
@@ -1,13 +1,28 @@
-from typing import Optional, Union
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
 
 from app.models.argument_analysis import ArgumentAnalysisResult
+from app.models.sentiment_analysis import SentimentAnalysisResult
+from app.models.summarization import SummarizationResult
+from app.models.entity_extraction import EntityExtractionResult
+from app.models.llm_models import ModelGenerationParams
+
+MAX_BATCH_SIZE = 32 # Analyses in one batch request, and applications in one composite request
 
 class ApplicationType(Enum):
     """Enum for different application types."""
     ARGUMENT_ANALYSIS = "argument_analysis"
+    SENTIMENT_ANALYSIS = "sentiment_analysis"
+    SUMMARIZATION = "summarization"
+    ENTITY_EXTRACTION = "entity_extraction"
+
+class RepairOutcome(Enum):
+    """How a malformed model output was turned into a valid result."""
+    LOCAL = "local" # Fixed deterministically (syntax, out-of-range scores, derived counts)
+    MODEL = "model" # Fixed by a short repair prompt to the model
+    FAILED = "failed" # Could not be repaired, the fallback result was returned
 
 class AnalysisRequest(BaseModel):
     """Request model for text analysis."""
@@ -15,8 +30,9 @@ class AnalysisRequest(BaseModel):
     application: ApplicationType = Field(..., description="Type of analysis to perform")
     model_name: Optional[str] = Field(default=None, description="Analysis model to use")
     prompt_name: Optional[str] = Field(default=None, description="Name of the prompt to use for analysis")
+    generation_params: Optional[ModelGenerationParams] = Field(default=None, description="Generation parameters overriding the model's saved configuration for this request only. Only the fields that are set are applied, null values are ignored.")
 
-AnalysisResult = Union[ArgumentAnalysisResult] # Eventually, this will contain all possible analysis results
+AnalysisResult = Union[ArgumentAnalysisResult, SentimentAnalysisResult, SummarizationResult, EntityExtractionResult]
 
 class AnalysisStatistics(BaseModel):
     """Statistics for an analysis."""        
@@ -38,14 +54,59 @@ class AnalysisStatistics(BaseModel):
     context_window_prompt_fill_rate: float = Field(..., description="How much of the model's context window is used by the input prompt")
     context_window_response_fill_rate: float = Field(..., description="How much of the model's context window is used by the response")  
     overhead_time: int = Field(..., description="Overhead time (ns)")
+    estimated_prompt_tokens: Optional[int] = Field(None, description="Pre-flight estimate of the number of tokens in the input prompt")
+    token_estimate_error: Optional[float] = Field(None, description="Relative error of the pre-flight estimate against prompt_eval_count ((estimated - actual) / actual)")
+    context_bucket: Optional[int] = Field(None, description="Context window size (num_ctx) the request was run with")
+    early_stopped: Optional[bool] = Field(None, description="Whether generation was cut off because the model kept writing after a complete result. Durations and prompt_eval_count are then measured or estimated client-side")
+    unused_budget: Optional[int] = Field(None, description="Generation budget (num_predict) left when the generation was cut off, not the number of tokens it would have gone on to generate. 0 when the model stopped on its own")
+    repair_outcome: Optional[RepairOutcome] = Field(None, description="Outcome of the repair pass, when the model output didn't parse into a valid result")
+    repair_prompt_tokens: Optional[int] = Field(None, description="Number of tokens in the repair prompt, when the model was asked to repair its output")
+    repair_eval_tokens: Optional[int] = Field(None, description="Number of tokens generated by the repair prompt")
+    repair_duration: Optional[int] = Field(None, description="Time taken by the repair pass (ns)")
 
 class AnalysisResponse(BaseModel):
     """ Response model for analsysis results. """
     model_used: str = Field(..., description="Model used for analysis")
     success: bool = Field(..., description="Whether the analysis was successful")
+    application: Optional[ApplicationType] = Field(None, description="Type of analysis performed")
     timestamp: datetime = Field(default_factory=datetime.now, description="Analysis timestamp")
     result: Optional[AnalysisResult] = Field(default=None, description="Tool specific analysis result")
     raw_model_response: Optional[str] = Field(None, description="Raw model response")
     statistics: Optional[AnalysisStatistics] = Field(None, description="Analysis statistics and metadata") 
+    cached: bool = Field(False, description="Whether the result was served from the semantic cache instead of a new generation")
+    cache_similarity: Optional[float] = Field(None, description="Cosine similarity between the input text and the cached text the result was taken from")
+    coalesced: bool = Field(False, description="Whether this request attached to an identical analysis that was already in flight instead of starting its own")
+    error: Optional[str] = Field(None, description="Why the analysis could not be run, when it failed before producing a result")
+
+class ApplicationRequest(BaseModel):
+    """One application to run as part of a composite analysis."""
+    application: ApplicationType = Field(..., description="Type of analysis to perform")
+    prompt_name: Optional[str] = Field(default=None, description="Name of the prompt to use. Defaults to the first prompt defined for the application")
+    generation_params: Optional[ModelGenerationParams] = Field(default=None, description="Generation parameters overriding the model's saved configuration for this application only")
+
+class CompositeAnalysisRequest(BaseModel):
+    """Request model for running several analyses over the same text."""
+    text: str = Field(..., min_length=10, description="Text to analyse")
+    model_name: str = Field(..., description="Analysis model to use for every application")
+    applications: List[ApplicationRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Applications to run over the text")
+
+class CompositeAnalysisResponse(BaseModel):
+    """Combined results of a composite analysis, one response per requested application in request order."""
+    model_used: str = Field(..., description="Model used for analysis")
+    success: bool = Field(..., description="Whether every application succeeded")
+    timestamp: datetime = Field(default_factory=datetime.now, description="Analysis timestamp")
+    total_duration: int = Field(..., description="Wall-clock time to run every application, including shared preprocessing (ns)")
+    results: List[AnalysisResponse] = Field(..., description="Per-application responses, each with its own statistics")
 
 
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for running several independent analyses in one request."""
+    requests: List[AnalysisRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Analyses to run")
+
+class BatchAnalysisResponse(BaseModel):
+    """Results of a batch analysis, one response per request in request order."""
+    success: bool = Field(..., description="Whether every analysis succeeded")
+    timestamp: datetime = Field(default_factory=datetime.now, description="Analysis timestamp")
+    total_duration: int = Field(..., description="Wall-clock time to run every analysis (ns)")
+    results: List[AnalysisResponse] = Field(..., description="Per-request responses, each with its own statistics")
@@ -0,0 +1,34 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from app.models.argument_analysis import Argument
+
+class ArgumentSearchRequest(BaseModel):
+    """Query over the arguments extracted by past analyses."""
+    query: Optional[str] = Field(None, description="Full-text query over argument statements, supporting claims and qualifiers")
+    similar_to: Optional[str] = Field(None, description="Text to rank arguments against by embedding similarity")
+    model_name: Optional[str] = Field(None, description="Only return arguments extracted by this model")
+    prompt_name: Optional[str] = Field(None, description="Only return arguments extracted with this prompt")
+    min_credibility: Optional[float] = Field(None, ge=0.0, le=1.0, description="Minimum credibility score of the source analysis")
+    max_credibility: Optional[float] = Field(None, ge=0.0, le=1.0, description="Maximum credibility score of the source analysis")
+    min_confidence: Optional[float] = Field(None, ge=0.0, le=1.0, description="Minimum confidence score of the argument")
+    max_confidence: Optional[float] = Field(None, ge=0.0, le=1.0, description="Maximum confidence score of the argument")
+    limit: int = Field(20, ge=1, le=500, description="Maximum number of arguments to return")
+
+class ArgumentSearchHit(BaseModel):
+    """An indexed argument and the analysis it came from."""
+    argument: Argument = Field(..., description="The extracted argument")
+    score: Optional[float] = Field(None, description="Cosine similarity for similarity searches, BM25 relevance (higher is better) for full-text searches")
+    analysis_id: int = Field(..., description="Identifier of the source analysis")
+    text_hash: str = Field(..., description="SHA-256 of the analyzed text, identifies the source document")
+    text_preview: str = Field(..., description="Beginning of the analyzed text")
+    model_name: str = Field(..., description="Model used for the source analysis")
+    prompt_name: str = Field(..., description="Prompt used for the source analysis")
+    credibility_score: float = Field(..., description="Overall credibility score of the source analysis")
+    created_at: datetime = Field(..., description="When the source analysis was indexed")
+
+class ArgumentSearchResponse(BaseModel):
+    """Results of an argument search."""
+    results: List[ArgumentSearchHit] = Field(..., description="Matching arguments, best first")
+    took_ms: float = Field(..., description="Time taken to run the search (ms)")
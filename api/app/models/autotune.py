@@ -0,0 +1,73 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+
+from app.models.analysis import ApplicationType
+from app.models.llm_models import ModelGenerationParams
+
+class AutotuneObjective(Enum):
+    """What the autotuner optimizes for."""
+    TOKENS_PER_SECOND = "tokens_per_second"
+    TIME_TO_FIRST_TOKEN = "time_to_first_token"
+    TOTAL_DURATION = "total_duration"
+
+class AutotuneStatus(Enum):
+    """Status of an autotune job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class AutotuneGrid(BaseModel):
+    """
+    Values to try for each performance option. Every combination is benchmarked. An option left unset keeps the
+    model's saved value.
+    """
+    context_length: Optional[List[int]] = Field(None, min_length=1, description="Context window lengths (num_ctx) to try. Ignored when adaptive context is enabled, since analyses then size their context window per request")
+    thread_count: Optional[List[Optional[int]]] = Field(None, min_length=1, description="CPU thread counts (num_thread) to try. null lets Ollama pick. Defaults to Ollama's choice, half and all of the host's CPUs")
+    gpu_count: Optional[List[int]] = Field(None, min_length=1, description="GPU offload settings (num_gpu) to try. 0 runs on CPU only")
+    keep_alive: Optional[List[Optional[str]]] = Field(None, min_length=1, description="Keep-alive durations to try (e.g. '5m', '0'). null uses Ollama's default")
+
+class AutotuneRequest(BaseModel):
+    """Request model for starting an autotune job."""
+    grid: AutotuneGrid = Field(default_factory=AutotuneGrid, description="Performance options to sweep")
+    application: ApplicationType = Field(ApplicationType.ARGUMENT_ANALYSIS, description="Application whose prompt the workload is run with")
+    prompt_name: Optional[str] = Field(None, description="Prompt to run the workload with. Defaults to the application's first prompt")
+    sample_texts: Optional[List[str]] = Field(None, min_length=1, description="Texts to benchmark with. Defaults to a small built-in workload")
+    repetitions: int = Field(1, ge=1, le=10, description="Number of times the workload is run for each configuration")
+    objective: AutotuneObjective = Field(AutotuneObjective.TOKENS_PER_SECOND, description="Metric the recommended configuration is chosen on")
+    min_parse_success_rate: float = Field(1.0, ge=0.0, le=1.0, description="Configurations whose output parses into a valid result less often than this are not recommended")
+    apply: bool = Field(True, description="Save the recommended configuration as the model's configuration")
+
+class AutotuneTrial(BaseModel):
+    """Benchmark of one configuration over the workload."""
+    generation_params: ModelGenerationParams = Field(..., description="Configuration that was benchmarked")
+    runs: int = Field(0, description="Generations that completed")
+    errors: int = Field(0, description="Generations that failed")
+    parse_success_rate: float = Field(0.0, description="Share of completed generations whose output parsed into a valid result")
+    load_duration: Optional[int] = Field(None, description="Time to load the model with this configuration, from the first run (ns)")
+    mean_load_duration: Optional[float] = Field(None, description="Mean load time over all runs, which shows reloads between requests (ns)")
+    time_to_first_token: Optional[float] = Field(None, description="Mean time to first token (s)")
+    tokens_per_second: Optional[float] = Field(None, description="Mean rate of token generation for the response")
+    prompt_tokens_per_second: Optional[float] = Field(None, description="Mean rate of processing input tokens")
+    total_duration: Optional[float] = Field(None, description="Mean total time per generation (ns)")
+    error: Optional[str] = Field(None, description="Last error, if any generation failed")
+
+class AutotuneJob(BaseModel):
+    """An autotune job and its report."""
+    job_id: str = Field(..., description="Job identifier")
+    model_name: str = Field(..., description="Model being tuned")
+    client_id: str = Field(..., description="Client that started the job")
+    status: AutotuneStatus = Field(AutotuneStatus.PENDING, description="Status of the job")
+    request: AutotuneRequest = Field(..., description="Request the job was started with")
+    baseline: ModelGenerationParams = Field(..., description="Model configuration when the job started")
+    trials_total: int = Field(..., description="Number of configurations to benchmark")
+    trials: List[AutotuneTrial] = Field(default_factory=list, description="Benchmarked configurations, in the order they were run")
+    recommended: Optional[AutotuneTrial] = Field(None, description="Best configuration by the objective among those meeting the parse success rate")
+    applied: bool = Field(False, description="Whether the recommended configuration was saved as the model's configuration")
+    error: Optional[str] = Field(None, description="Why the job failed, if it did")
+    notes: List[str] = Field(default_factory=list, description="Options of the request that were not applied, and why")
+    created_at: datetime = Field(default_factory=datetime.now, description="When the job was started")
+    finished_at: Optional[datetime] = Field(None, description="When the job finished")
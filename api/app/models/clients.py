@@ -0,0 +1,36 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class ClientConfig(BaseModel):
+    """An API client: its key, its share of the model and its token quotas. Quotas are counted in prompt + generated tokens."""
+    client_id: str = Field(..., description="Client identifier, e.g. the team name")
+    api_key_sha256: Optional[str] = Field(None, description="SHA-256 hex digest of the client's API key")
+    weight: float = Field(1.0, gt=0.0, description="Share of generation capacity relative to other clients when they compete for the model")
+    tokens_per_minute: Optional[int] = Field(None, ge=1, description="Sustained token rate. Unlimited when not set")
+    burst_tokens: Optional[int] = Field(None, ge=1, description="Tokens that can be used at once after being idle. Defaults to tokens_per_minute")
+    daily_token_quota: Optional[int] = Field(None, ge=1, description="Tokens that can be used per UTC day. Unlimited when not set")
+    admin: bool = Field(False, description="Whether the client can see the usage of every client")
+
+class ClientsFile(BaseModel):
+    """Contents of the clients file."""
+    clients: List[ClientConfig] = Field(default_factory=list, description="Configured API clients")
+
+class ClientUsage(BaseModel):
+    """Token usage and throttling of a client since the server started."""
+    client_id: str = Field(..., description="Client identifier")
+    requests: int = Field(..., description="Analysis requests admitted")
+    prompt_tokens: int = Field(..., description="Prompt tokens processed for the client's generations (prompt_eval_count)")
+    eval_tokens: int = Field(..., description="Tokens generated for the client's generations (eval_count)")
+    total_tokens: int = Field(..., description="Prompt and generated tokens")
+    throttled: int = Field(..., description="Analysis requests and generations rejected because the client was over quota")
+    queued: int = Field(..., description="Generations that waited for a generation slot")
+    queue_wait_seconds: float = Field(..., description="Total time the client's generations waited for a generation slot")
+    available_tokens: Optional[float] = Field(None, description="Tokens currently available in the rate limit bucket, negative while paying off a large request")
+    reserved_tokens: int = Field(..., description="Worst-case cost reserved by the client's generations in flight")
+    daily_tokens_used: int = Field(..., description="Tokens used today (UTC)")
+    daily_token_quota: Optional[int] = Field(None, description="Tokens that can be used per UTC day")
+
+class UsageResponse(BaseModel):
+    """Usage per client."""
+    authentication_enabled: bool = Field(..., description="Whether API keys are required. When not, every request is made as the anonymous client")
+    clients: List[ClientUsage] = Field(..., description="Usage of each client visible to the caller")
@@ -0,0 +1,53 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from app.models.analysis import AnalysisResponse
+from app.models.argument_analysis import ArgumentAnalysisResult
+from app.models.llm_models import ModelGenerationParams
+
+class DocumentSegment(BaseModel):
+    """A segment of a document revision and its argument analysis."""
+    text_hash: str = Field(..., description="SHA-256 of the segment text")
+    length: int = Field(..., description="Length of the segment text (characters)")
+    success: bool = Field(..., description="Whether the segment was analyzed successfully. Failed segments are re-analyzed on the next revision")
+    result: Optional[ArgumentAnalysisResult] = Field(None, description="Argument analysis of the segment, when it succeeded")
+
+class DocumentSession(BaseModel):
+    """The latest analyzed revision of a document, segmented and hashed so later revisions only re-analyze what changed."""
+    session_id: str = Field(..., description="Session identifier")
+    client_id: str = Field(..., description="Client that owns the session")
+    revision: int = Field(..., description="Number of revisions analyzed")
+    analysis_key: str = Field(..., description="Model, prompt version and generation parameters the segments were analyzed with")
+    model_name: str = Field(..., description="Model used for analysis")
+    prompt_name: str = Field(..., description="Prompt used for analysis")
+    segments: List[DocumentSegment] = Field(default_factory=list, description="Segments of the latest revision, in document order")
+    created_at: datetime = Field(default_factory=datetime.now, description="When the session was created")
+    updated_at: datetime = Field(default_factory=datetime.now, description="When the latest revision was analyzed")
+
+class DocumentAnalysisRequest(BaseModel):
+    """Request model for analyzing a revision of a document."""
+    text: str = Field(..., min_length=10, description="Full text of the document revision")
+    session_id: Optional[str] = Field(None, description="Session of the previous revision. A new session is started when not set")
+    model_name: str = Field(..., description="Analysis model to use")
+    prompt_name: Optional[str] = Field(None, description="Argument analysis prompt to use. Defaults to the first argument analysis prompt")
+    generation_params: Optional[ModelGenerationParams] = Field(None, description="Generation parameters overriding the model's saved configuration for this request only")
+
+class DocumentAnalysisResponse(BaseModel):
+    """Argument analysis of a document revision, merged from its segments."""
+    session_id: str = Field(..., description="Session to pass with the next revision")
+    revision: int = Field(..., description="Revision number of this analysis")
+    model_used: str = Field(..., description="Model used for analysis")
+    success: bool = Field(..., description="Whether every segment was analyzed successfully")
+    timestamp: datetime = Field(default_factory=datetime.now, description="Analysis timestamp")
+    result: ArgumentAnalysisResult = Field(..., description="Argument analysis of the whole document, merged from its segments in document order")
+    segments_total: int = Field(..., description="Number of segments in the revision")
+    segments_reused: int = Field(..., description="Segments unchanged since the previous revision, whose results were reused")
+    segments_analyzed: int = Field(..., description="New or changed segments that were analyzed")
+    characters_reused: int = Field(..., description="Characters of the revision covered by reused results")
+    characters_analyzed: int = Field(..., description="Characters of the revision that were analyzed")
+    reuse_ratio: float = Field(..., description="Share of the revision's characters covered by reused results")
+    prompt_tokens: int = Field(..., description="Prompt tokens processed to analyze the changed segments")
+    eval_tokens: int = Field(..., description="Tokens generated to analyze the changed segments")
+    total_duration: int = Field(..., description="Wall-clock time to analyze the revision (ns)")
+    segment_responses: List[AnalysisResponse] = Field(default_factory=list, description="Responses for the analyzed segments, in document order, each with its own statistics")
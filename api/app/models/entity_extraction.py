@@ -0,0 +1,14 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class Entity(BaseModel):
+    """A named entity mentioned in the text."""
+    name: str = Field(..., description="Canonical name of the entity")
+    entity_type: str = Field(..., description="Entity type (e.g., 'person', 'organization', 'location', 'date')")
+    mentions: int = Field(1, ge=1, description="Number of times the entity is mentioned")
+    context: Optional[str] = Field(None, description="Short description of the entity's role in the text")
+
+class EntityExtractionResult(BaseModel):
+    """ Named entities extracted from input text. """
+    entities: List[Entity] = Field(..., description="Entities extracted from the text")
+    entity_count: int = Field(..., ge=0, description="Total number of distinct entities identified")
@@ -7,12 +7,14 @@ class ModelGenerationParams(BaseModel):
     temperature: Optional[float] = Field(0.8, ge=0.0, le=1.0, description="Sampling temperature")
     top_p: Optional[float] = Field(0.9, ge=0.0, le=1.0, description="Top-p (nucleus) sampling")
     top_k: Optional[int] = Field(40, ge=1, description="Top-k sampling")
-    max_tokens: Optional[int] = Field(500, ge=1, description="Maximum tokens to generate")
+    max_tokens: Optional[int] = Field(2048, ge=1, description="Maximum tokens to generate (num_predict)")
     repeat_last_n: Optional[int] = Field(64, ge=1, description="Number of tokens to consider for repetition")
     repeat_penalty: Optional[float] = Field(1.1, ge=0.0, description="Repetition penalty")
     context_length: Optional[int] = Field(2048, ge=1, description="Context window length")
     seed: Optional[int] = Field(None, ge=0, description="Random seed")
     gpu_count: Optional[int] = Field(0, ge=-1, description="Number of GPUs to use. -1 means the number must be set dynamically, and 0 disables GPU usage.")
+    thread_count: Optional[int] = Field(None, ge=1, description="Number of CPU threads to use for generation. Ollama picks a value based on the host when not set.")
+    keep_alive: Optional[str] = Field(None, description="How long the model stays loaded after a request (e.g. '5m', '1h', '-1' to keep it loaded). Ollama's default when not set.")
 
 class ModelMetadata(BaseModel):
     """ Metadata for LLM models. """
@@ -35,6 +37,14 @@ class ModelsResponse(BaseModel):
 
  
 
+class ModelInstanceCacheStats(BaseModel):
+    """Statistics for the LRU cache of LLM instances."""
+    size: int = Field(..., description="Number of LLM instances currently cached")
+    capacity: int = Field(..., description="Maximum number of LLM instances kept before the least recently used is evicted")
+    hits: int = Field(..., description="Requests served by an existing LLM instance")
+    misses: int = Field(..., description="Requests that required a new LLM instance")
+    evictions: int = Field(..., description="LLM instances evicted to stay within capacity")
+
 class ModelResetResponse(BaseModel):
     """Response containing the result of a model reset."""
     success: bool = Field(..., description="Whether the model reset was successful")
@@ -0,0 +1,24 @@
+from typing import List
+from pydantic import BaseModel, Field
+from enum import Enum
+
+class SentimentLabel(Enum):
+    """Overall polarity of a text or aspect."""
+    POSITIVE = "positive"
+    NEGATIVE = "negative"
+    NEUTRAL = "neutral"
+    MIXED = "mixed"
+
+class AspectSentiment(BaseModel):
+    """Sentiment expressed towards a specific aspect or topic of the text."""
+    aspect: str = Field(..., description="The aspect or topic the sentiment is about")
+    sentiment: SentimentLabel = Field(..., description="Polarity of the sentiment towards the aspect")
+    sentiment_score: float = Field(..., ge=-1.0, le=1.0, description="Sentiment from -1 (very negative) to 1 (very positive)")
+
+class SentimentAnalysisResult(BaseModel):
+    """ Complete sentiment analysis results for input text. """
+    overall_sentiment: SentimentLabel = Field(..., description="Overall polarity of the text")
+    sentiment_score: float = Field(..., ge=-1.0, le=1.0, description="Overall sentiment from -1 (very negative) to 1 (very positive)")
+    confidence_score: float = Field(..., ge=0.0, le=1.0, description="Confidence in the sentiment analysis")
+    aspects: List[AspectSentiment] = Field(default_factory=list, description="Sentiment towards individual aspects of the text")
+    rationale: str = Field(..., description="Analysis model's explanation of the sentiment assessment")
@@ -0,0 +1,7 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+class SummarizationResult(BaseModel):
+    """ Summary of input text. """
+    summary: str = Field(..., description="Concise summary of the text")
+    key_points: List[str] = Field(default_factory=list, description="Key points made in the text")
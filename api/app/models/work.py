@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+class WorkStats(BaseModel):
+    """Counters of the analysis requests handled by this server."""
+    accepting: bool = Field(..., description="Whether new analyses are admitted. False once the server is shutting down")
+    active: int = Field(..., description="Analysis requests currently in flight")
+    completed: int = Field(..., description="Analysis requests that returned a response")
+    failed: int = Field(..., description="Analysis requests that failed with an error")
+    disconnected: int = Field(..., description="Analysis requests abandoned because the client disconnected")
+    cancelled: int = Field(..., description="Analysis requests cancelled because they didn't finish before the shutdown deadline")
+    wasted_prompt_tokens: int = Field(..., description="Prompt tokens sent to Ollama for generations that were aborted before producing a result")
+    wasted_eval_tokens: int = Field(..., description="Tokens generated by generations that were aborted before producing a result")
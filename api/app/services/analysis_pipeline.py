@@ -0,0 +1,69 @@
+import time
+import asyncio
+
+from app.models.analysis import (
+    AnalysisRequest,
+    AnalysisResponse,
+    ApplicationRequest,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    CompositeAnalysisRequest,
+    CompositeAnalysisResponse
+)
+from app.services.analyzer_registry import analyzer_registry
+from app.services.text_analyzer import PreparedText, prepare_text
+
+
+class AnalysisPipeline:
+    """
+    Runs several analyses in one request, concurrently, sharing the model instance cache and the generation scheduler.
+    A composite analysis runs several applications over one text, which is prepared (hashed, token-estimated and
+    embedded) once. A batch runs independent analysis requests.
+    """
+    async def _run_application(self, prepared: PreparedText, request: ApplicationRequest) -> AnalysisResponse:
+        """Run one application. Failures are reported in its response rather than failing the whole request."""
+        try:
+            analyzer = analyzer_registry.get(request.application)
+            if not analyzer:
+                raise ValueError(f"No analyzer for application '{request.application.value}'")
+            return await analyzer.analyze_prepared(prepared, request.prompt_name, request.generation_params)
+        except Exception as e:
+            print(f"Error running {request.application.value}: {e}")
+            return AnalysisResponse(
+                model_used=prepared.model_name or "",
+                success=False,
+                application=request.application,
+                timestamp=time.time(),
+                error=str(e)
+            )
+
+    async def run(self, request: CompositeAnalysisRequest) -> CompositeAnalysisResponse:
+        start = time.perf_counter_ns()
+        prepared = await prepare_text(request.text, request.model_name)
+        results = await asyncio.gather(*(self._run_application(prepared, application) for application in request.applications))
+        return CompositeAnalysisResponse(
+            model_used=request.model_name,
+            success=all(result.success for result in results),
+            total_duration=time.perf_counter_ns() - start,
+            results=results
+        )
+
+    async def run_batch(self, request: BatchAnalysisRequest) -> BatchAnalysisResponse:
+        start = time.perf_counter_ns()
+
+        async def run_request(analysis: AnalysisRequest) -> AnalysisResponse:
+            prepared = await prepare_text(analysis.text, analysis.model_name)
+            return await self._run_application(prepared, ApplicationRequest(
+                application=analysis.application,
+                prompt_name=analysis.prompt_name,
+                generation_params=analysis.generation_params
+            ))
+
+        results = await asyncio.gather(*(run_request(analysis) for analysis in request.requests))
+        return BatchAnalysisResponse(
+            success=all(result.success for result in results),
+            total_duration=time.perf_counter_ns() - start,
+            results=results
+        )
+
+analysis_pipeline = AnalysisPipeline()
@@ -0,0 +1,24 @@
+from typing import Dict, Optional
+
+from app.models.analysis import ApplicationType
+from app.services.text_analyzer import TextAnalyzer
+from app.services.argument_analyzer import argument_analyzer
+from app.services.sentiment_analyzer import sentiment_analyzer
+from app.services.summarization_analyzer import summarization_analyzer
+from app.services.entity_analyzer import entity_analyzer
+
+
+class AnalyzerRegistry:
+    """Maps each application type to the analyzer that runs it."""
+    def __init__(self):
+        self.analyzers: Dict[ApplicationType, TextAnalyzer] = {}
+
+    def register(self, analyzer: TextAnalyzer):
+        self.analyzers[analyzer.application] = analyzer
+
+    def get(self, application: ApplicationType) -> Optional[TextAnalyzer]:
+        return self.analyzers.get(application)
+
+analyzer_registry = AnalyzerRegistry()
+for analyzer in (argument_analyzer, sentiment_analyzer, summarization_analyzer, entity_analyzer):
+    analyzer_registry.register(analyzer)
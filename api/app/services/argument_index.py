@@ -0,0 +1,520 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from app.core.config import settings
+from app.models.argument_analysis import Argument, ArgumentAnalysisResult
+from app.models.argument_index import ArgumentSearchHit, ArgumentSearchRequest, ArgumentSearchResponse
+from app.services.embedding_service import embedding_service
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    text_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    prompt_name TEXT NOT NULL,
+    prompt_version TEXT,
+    credibility_score REAL NOT NULL,
+    overall_assessment TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS arguments (
+    id INTEGER PRIMARY KEY,
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id),
+    argument TEXT NOT NULL,
+    supporting_claims TEXT NOT NULL,
+    qualifiers TEXT NOT NULL,
+    confidence_score REAL NOT NULL,
+    vector_row INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_text_hash ON analyses(text_hash);
+CREATE INDEX IF NOT EXISTS idx_analyses_model_prompt ON analyses(model_name, prompt_name);
+CREATE INDEX IF NOT EXISTS idx_analyses_credibility ON analyses(credibility_score);
+CREATE INDEX IF NOT EXISTS idx_arguments_analysis ON arguments(analysis_id);
+CREATE INDEX IF NOT EXISTS idx_arguments_confidence ON arguments(confidence_score);
+CREATE INDEX IF NOT EXISTS idx_arguments_vector_row ON arguments(vector_row);
+CREATE VIRTUAL TABLE IF NOT EXISTS arguments_fts USING fts5(
+    argument, supporting_claims, qualifiers,
+    content='arguments', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+class IndexBuildCancelled(Exception):
+    """The IVF index build was stopped, e.g. on shutdown."""
+
+@dataclass
+class IvfIndex:
+    """
+    Inverted-file index over the first `rows` rows of the vector file. Every row is assigned to its nearest centroid,
+    and the rows of list i are list_rows[offsets[i]:offsets[i + 1]], in ascending order.
+    """
+    centroids: np.ndarray
+    offsets: np.ndarray
+    list_rows: np.ndarray
+
+    @property
+    def rows(self) -> int:
+        return len(self.list_rows)
+
+    def probe(self, query_vector: np.ndarray, probes: int) -> np.ndarray:
+        """Rows of the lists whose centroids are nearest to the query, in ascending order."""
+        probes = min(probes, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query_vector), probes - 1)[:probes]
+        rows = np.concatenate([self.list_rows[self.offsets[i]:self.offsets[i + 1]] for i in nearest])
+        rows.sort()
+        return rows
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_rows: int, stop: Optional[threading.Event] = None) -> np.ndarray:
+    """Index of the nearest centroid (highest dot product) of every vector, computed in chunks."""
+    assignment = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], chunk_rows):
+        if stop is not None and stop.is_set():
+            raise IndexBuildCancelled()
+        assignment[start:start + chunk_rows] = np.argmax(np.asarray(vectors[start:start + chunk_rows]) @ centroids.T, axis=1)
+    return assignment
+
+def build_ivf(
+    vectors: np.ndarray,
+    lists: int,
+    sample_rows: int,
+    iterations: int = 10,
+    chunk_rows: int = 4096,
+    seed: int = 0,
+    stop: Optional[threading.Event] = None
+) -> IvfIndex:
+    """
+    Build an IVF index over unit-length vectors: spherical k-means on a sample of the rows, then every row is assigned
+    to its nearest centroid. Empty clusters are reseeded from random sample rows.
+    """
+    rng = np.random.default_rng(seed)
+    lists = max(1, min(lists, vectors.shape[0]))
+    sample = np.sort(rng.choice(vectors.shape[0], size=min(sample_rows, vectors.shape[0]), replace=False))
+    training = np.asarray(vectors[sample], dtype=np.float32)
+    lists = min(lists, len(training))
+    centroids = training[rng.choice(len(training), size=lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = _assign(training, centroids, chunk_rows, stop)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, training)
+        empty = np.bincount(assignment, minlength=lists) == 0
+        sums[empty] = training[rng.choice(len(training), size=int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    assignment = _assign(vectors, centroids, chunk_rows, stop)
+    return IvfIndex(
+        centroids=centroids,
+        offsets=np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))]).astype(np.int64),
+        list_rows=np.argsort(assignment, kind="stable").astype(np.int64)
+    )
+
+class ArgumentIndex:
+    """
+    Persistent, searchable index of every argument extracted by past analyses.
+
+    Arguments live in SQLite, with an FTS5 index over the argument statement, supporting claims and qualifiers.
+    Argument embeddings are appended to a flat float32 file that is memory-mapped for search. Row i of the file
+    belongs to the argument whose vector_row is i.
+
+    Similarity search is an exact dot-product scan, done in chunks so memory stays flat, until argument_index_ivf_min_rows
+    arguments have embeddings. An approximate IVF index is then built in the background: k-means centroids over the
+    vectors, and for every centroid the rows nearest to it. A search only scores the rows of the
+    argument_index_ivf_probes lists nearest to the query, about probes / sqrt(rows) of the corpus, so it stays in the
+    milliseconds over millions of arguments, at the cost of missing some neighbours that fall in other lists. Rows
+    appended since the build are scanned exactly, and the index is rebuilt once they grow past a quarter of it.
+
+    With filters, the probed rows are ranked first and the best ones matching the filters are kept. When too few of
+    them match (a selective filter), or before the IVF index is built, at most MAX_FILTER_CANDIDATES matching rows are
+    scored. Full-text matches are capped at MAX_TEXT_CANDIDATES the same way.
+
+    Analyses are indexed in background tasks, so indexing never delays the analysis response. Writes are serialized
+    on a single connection. Searches use a read connection per worker thread, and under WAL they don't wait for
+    writes or for each other.
+    """
+    PREVIEW_LENGTH = 200
+    SCAN_CHUNK_ROWS = 65536
+    MAX_TEXT_CANDIDATES = 10000 # Full-text matches re-ranked by similarity when a search has both
+    MAX_FILTER_CANDIDATES = 50000 # Rows matching the filters scored when the IVF index can't serve a filtered search
+    FILTER_BATCH_ROWS = 500 # Probed rows checked against the filters at a time, best first
+    MAX_FILTER_CHECKED_ROWS = 5000 # Probed rows checked against the filters before falling back to the rows matching them
+    IVF_REBUILD_GROWTH = 0.25 # Rebuild the IVF index once the rows appended since the build exceed this share of it
+    IVF_SAMPLE_ROWS_PER_LIST = 64 # k-means training rows per list
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.database_path = os.path.join(index_dir, "arguments.db")
+        self.vectors_path = os.path.join(index_dir, "argument_vectors.f32")
+        self.dimension: Optional[int] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._readers = threading.local()
+        self._pending: Set[asyncio.Task] = set()
+        self.ivf_path = os.path.join(index_dir, "ivf.npz")
+        self._ivf: Optional[IvfIndex] = None
+        self._ivf_build: Optional[asyncio.Task] = None
+        self._stop_build = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the write connection on first use, creating the schema if needed."""
+        with self._write_lock:
+            if self._connection is None:
+                os.makedirs(self.index_dir, exist_ok=True)
+                connection = sqlite3.connect(self.database_path, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+                row = connection.execute("SELECT value FROM meta WHERE key = 'dimension'").fetchone()
+                self.dimension = int(row[0]) if row else None
+                self._connection = connection
+                self._ivf = self._load_ivf()
+            return self._connection
+
+    def _read_connection(self) -> sqlite3.Connection:
+        """The calling thread's read connection, opened on first use."""
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            self._connect()
+            connection = sqlite3.connect(self.database_path)
+            self._readers.connection = connection
+        return connection
+
+    def _vectors(self) -> Optional[np.ndarray]:
+        """
+        Memory-map the embedding file. Mapped per search since the file grows as analyses are indexed. Only whole rows
+        are mapped, in case a write is appending to the file.
+        """
+        if self.dimension is None or not os.path.exists(self.vectors_path):
+            return None
+        rows = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+        if rows == 0:
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension))
+
+    def _load_ivf(self) -> Optional[IvfIndex]:
+        """Load the IVF index saved by the last build, if it matches the vector file."""
+        if self.dimension is None or not os.path.exists(self.ivf_path):
+            return None
+        try:
+            with np.load(self.ivf_path) as data:
+                ivf = IvfIndex(centroids=data["centroids"], offsets=data["offsets"], list_rows=data["list_rows"])
+        except Exception as e:
+            print(f"Error loading the argument IVF index, searching exactly until it is rebuilt: {e}")
+            return None
+        vectors = self._vectors()
+        if ivf.centroids.shape[1] != self.dimension or vectors is None or ivf.rows > vectors.shape[0]:
+            print("Argument IVF index doesn't match the vector file, searching exactly until it is rebuilt")
+            return None
+        return ivf
+
+    def _build_ivf(self):
+        """Build the IVF index over the current vector file and save it. Runs in a worker thread."""
+        vectors = self._vectors()
+        if vectors is None:
+            return
+        start = time.perf_counter()
+        lists = int(np.sqrt(vectors.shape[0]))
+        try:
+            ivf = build_ivf(vectors, lists, lists * self.IVF_SAMPLE_ROWS_PER_LIST, stop=self._stop_build)
+        except IndexBuildCancelled:
+            return
+        temporary_path = self.ivf_path + ".tmp.npz"
+        np.savez(temporary_path, centroids=ivf.centroids, offsets=ivf.offsets, list_rows=ivf.list_rows)
+        os.replace(temporary_path, self.ivf_path)
+        self._ivf = ivf
+        print(f"Built argument IVF index over {ivf.rows} vectors with {len(ivf.centroids)} lists in {time.perf_counter() - start:.1f}s")
+
+    def _schedule_ivf_build(self):
+        """Build the IVF index in the background once there are enough vectors, or rebuild it once it is stale."""
+        if self._ivf_build is not None and not self._ivf_build.done():
+            return
+        vectors = self._vectors()
+        rows = vectors.shape[0] if vectors is not None else 0
+        if rows < settings.argument_index_ivf_min_rows:
+            return
+        if self._ivf is not None and rows - self._ivf.rows <= self._ivf.rows * self.IVF_REBUILD_GROWTH:
+            return
+        self._ivf_build = asyncio.create_task(asyncio.to_thread(self._build_ivf))
+        self._ivf_build.add_done_callback(self._ivf_build_done)
+
+    @staticmethod
+    def _ivf_build_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            print(f"Error building the argument IVF index: {task.exception()}")
+
+    def _append_vectors(self, connection: sqlite3.Connection, vectors: np.ndarray) -> Optional[int]:
+        """Append embeddings to the vector file and return the row of the first one."""
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+            connection.execute("INSERT INTO meta (key, value) VALUES ('dimension', ?)", (str(self.dimension),))
+        elif vectors.shape[1] != self.dimension:
+            print(f"Argument embedding dimension {vectors.shape[1]} doesn't match index dimension {self.dimension}, skipping vectors")
+            return None
+        with open(self.vectors_path, "ab") as file:
+            first_row = file.tell() // (self.dimension * 4)
+            file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        return first_row
+
+    def add_analysis(
+        self,
+        text: str,
+        model_name: str,
+        prompt_name: str,
+        prompt_version: Optional[str],
+        result: ArgumentAnalysisResult,
+        vectors: Optional[np.ndarray] = None
+    ) -> int:
+        """Index an analysis and its arguments. vectors holds one embedding per argument, in order."""
+        connection = self._connect()
+        with self._write_lock:
+            with connection:
+                cursor = connection.execute(
+                    """INSERT INTO analyses (text_hash, text, model_name, prompt_name, prompt_version, credibility_score, overall_assessment, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        hashlib.sha256(text.encode("utf-8")).hexdigest(), text, model_name, prompt_name, prompt_version,
+                        result.credibility_score, result.overall_assessment, datetime.now(timezone.utc).isoformat()
+                    )
+                )
+                analysis_id = cursor.lastrowid
+                first_row = self._append_vectors(connection, vectors) if vectors is not None and len(vectors) else None
+
+                for position, argument in enumerate(result.arguments):
+                    supporting_claims = "\n".join(argument.supporting_claims)
+                    qualifiers = "\n".join(argument.qualifiers)
+                    cursor = connection.execute(
+                        """INSERT INTO arguments (analysis_id, argument, supporting_claims, qualifiers, confidence_score, vector_row, data)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        (
+                            analysis_id, argument.argument, supporting_claims, qualifiers, argument.confidence_score,
+                            first_row + position if first_row is not None else None, argument.model_dump_json()
+                        )
+                    )
+                    connection.execute(
+                        "INSERT INTO arguments_fts (rowid, argument, supporting_claims, qualifiers) VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, argument.argument, supporting_claims, qualifiers)
+                    )
+            return analysis_id
+
+    async def index_analysis(self, text: str, model_name: str, prompt_name: str, prompt_version: Optional[str], result: ArgumentAnalysisResult):
+        """Embed the arguments of an analysis (when enabled) and add it to the index. Failures are logged, not raised."""
+        try:
+            vectors = None
+            if settings.argument_index_embeddings and result.arguments:
+                try:
+                    vectors = await embedding_service.embed_texts([argument.argument for argument in result.arguments])
+                except Exception as e:
+                    print(f"Error embedding arguments, indexing without vectors: {e}")
+            await asyncio.to_thread(self.add_analysis, text, model_name, prompt_name, prompt_version, result, vectors)
+            if vectors is not None:
+                self._schedule_ivf_build()
+        except Exception as e:
+            print(f"Error indexing analysis: {e}")
+
+    def schedule_analysis(self, text: str, model_name: str, prompt_name: str, prompt_version: Optional[str], result: ArgumentAnalysisResult):
+        """Index an analysis in a background task, so the analysis response doesn't wait for embedding and the write."""
+        task = asyncio.create_task(self.index_analysis(text, model_name, prompt_name, prompt_version, result))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def drain(self):
+        """Wait for the analyses still being indexed and stop an IVF index build, e.g. on shutdown."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._ivf_build is not None:
+            self._stop_build.set()
+            await asyncio.gather(self._ivf_build, return_exceptions=True)
+
+    def _filters(self, request: ArgumentSearchRequest) -> Tuple[str, List]:
+        """SQL conditions (on arguments g joined with analyses a) for the request's filters."""
+        clauses, params = [], []
+        for column, value, operator in (
+            ("a.model_name", request.model_name, "="),
+            ("a.prompt_name", request.prompt_name, "="),
+            ("a.credibility_score", request.min_credibility, ">="),
+            ("a.credibility_score", request.max_credibility, "<="),
+            ("g.confidence_score", request.min_confidence, ">="),
+            ("g.confidence_score", request.max_confidence, "<="),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Quote every term so user input can't be parsed as FTS5 syntax. Terms are implicitly ANDed."""
+        return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        if scores.size > k:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.size)
+        return candidates[np.argsort(-scores[candidates])]
+
+    def _scan_vectors(self, vectors: np.ndarray, query_vector: np.ndarray, k: int, start_row: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact nearest-neighbour scan over the vector file from start_row, in chunks. Returns the best rows and scores."""
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(start_row, vectors.shape[0], self.SCAN_CHUNK_ROWS):
+            chunk_scores = vectors[start:start + self.SCAN_CHUNK_ROWS] @ query_vector
+            chunk_top = self._top_k(chunk_scores, k)
+            best_rows = np.concatenate([best_rows, chunk_top + start])
+            best_scores = np.concatenate([best_scores, chunk_scores[chunk_top]])
+            keep = self._top_k(best_scores, k)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+        return best_rows, best_scores
+
+    def _ranked_rows(self, ivf: Optional[IvfIndex], vectors: np.ndarray, query_vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k best rows by similarity, best first: the probed lists of the IVF index and the rows appended since it
+        was built, or every row when there is no IVF index.
+        """
+        if ivf is None:
+            return self._scan_vectors(vectors, query_vector, k)
+        rows = ivf.probe(query_vector, settings.argument_index_ivf_probes)
+        scores = vectors[rows] @ query_vector
+        top = self._top_k(scores, k)
+        rows, scores = rows[top], scores[top]
+        if vectors.shape[0] > ivf.rows:
+            tail_rows, tail_scores = self._scan_vectors(vectors, query_vector, k, start_row=ivf.rows)
+            rows, scores = np.concatenate([rows, tail_rows]), np.concatenate([scores, tail_scores])
+            top = self._top_k(scores, k)
+            rows, scores = rows[top], scores[top]
+        return rows, scores
+
+    @staticmethod
+    def _rows_to_ids(connection: sqlite3.Connection, rows: np.ndarray, scores: np.ndarray, filters: str = "", params: Optional[List] = None) -> List[Tuple[int, float]]:
+        """(argument id, score) of the ranked rows whose arguments match the filters, in order."""
+        if not len(rows):
+            return []
+        placeholders = ",".join("?" * len(rows))
+        ids_by_row = dict(connection.execute(
+            f"""SELECT g.vector_row, g.id FROM arguments g JOIN analyses a ON a.id = g.analysis_id
+            WHERE g.vector_row IN ({placeholders}){filters}""",
+            [*(int(row) for row in rows), *(params or [])]
+        ))
+        return [(ids_by_row[int(row)], float(score)) for row, score in zip(rows, scores) if int(row) in ids_by_row]
+
+    def _search_filtered_ivf(self, connection: sqlite3.Connection, ivf: IvfIndex, vectors: np.ndarray, query_vector: np.ndarray, filters: str, params: List, k: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Rank every probed row and keep the best ones matching the filters, checked a batch at a time. None when fewer
+        than k of the best MAX_FILTER_CHECKED_ROWS match, so the caller can fall back to scoring the rows matching the
+        filters.
+        """
+        rows = ivf.probe(query_vector, settings.argument_index_ivf_probes)
+        if vectors.shape[0] > ivf.rows:
+            rows = np.concatenate([rows, np.arange(ivf.rows, vectors.shape[0], dtype=np.int64)])
+        scores = vectors[rows] @ query_vector
+        order = self._top_k(scores, self.MAX_FILTER_CHECKED_ROWS)
+        scored = []
+        for start in range(0, len(order), self.FILTER_BATCH_ROWS):
+            batch = order[start:start + self.FILTER_BATCH_ROWS]
+            scored.extend(self._rows_to_ids(connection, rows[batch], scores[batch], filters, params))
+            if len(scored) >= k:
+                return scored[:k]
+        return None
+
+    def _score_candidates(self, vectors: np.ndarray, candidates: List[Tuple[int, Optional[int]]], query_vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Rank (argument id, vector row) candidates by similarity. Candidates without a vector are dropped."""
+        candidates = [(argument_id, row) for argument_id, row in candidates if row is not None and row < vectors.shape[0]]
+        if not candidates:
+            return []
+        rows = np.fromiter((row for _, row in candidates), dtype=np.int64, count=len(candidates))
+        scores = vectors[rows] @ query_vector
+        return [(candidates[i][0], float(scores[i])) for i in self._top_k(scores, k)]
+
+    def _hydrate(self, connection: sqlite3.Connection, scored: List[Tuple[int, Optional[float]]]) -> List[ArgumentSearchHit]:
+        """Load the arguments and their source analyses, keeping the ranked order."""
+        if not scored:
+            return []
+        ids = [argument_id for argument_id, _ in scored]
+        placeholders = ",".join("?" * len(ids))
+        rows: Dict[int, tuple] = {
+            row[0]: row for row in connection.execute(
+                f"""SELECT g.id, g.data, a.id, a.text_hash, substr(a.text, 1, {self.PREVIEW_LENGTH}), a.model_name, a.prompt_name, a.credibility_score, a.created_at
+                FROM arguments g JOIN analyses a ON a.id = g.analysis_id WHERE g.id IN ({placeholders})""",
+                ids
+            )
+        }
+        return [
+            ArgumentSearchHit(
+                argument=Argument.model_validate_json(rows[argument_id][1]),
+                score=score,
+                analysis_id=rows[argument_id][2],
+                text_hash=rows[argument_id][3],
+                text_preview=rows[argument_id][4],
+                model_name=rows[argument_id][5],
+                prompt_name=rows[argument_id][6],
+                credibility_score=rows[argument_id][7],
+                created_at=rows[argument_id][8]
+            )
+            for argument_id, score in scored if argument_id in rows
+        ]
+
+    def _search(self, request: ArgumentSearchRequest, query_vector: Optional[np.ndarray]) -> List[ArgumentSearchHit]:
+        connection = self._read_connection()
+        filters, params = self._filters(request)
+        ivf = self._ivf
+        vectors = self._vectors() if query_vector is not None else None
+        if query_vector is not None and (vectors is None or vectors.shape[1] != query_vector.shape[0]):
+            return []
+
+        if request.query:
+            # Matches are re-ranked by similarity when there is a query vector, so skip BM25 ordering then
+            order, limit = ("", self.MAX_TEXT_CANDIDATES) if query_vector is not None else (" ORDER BY bm25(arguments_fts)", request.limit)
+            matches = connection.execute(
+                f"""SELECT g.id, g.vector_row, bm25(arguments_fts) FROM arguments_fts
+                JOIN arguments g ON g.id = arguments_fts.rowid JOIN analyses a ON a.id = g.analysis_id
+                WHERE arguments_fts MATCH ?{filters}{order} LIMIT ?""",
+                [self._fts_query(request.query), *params, limit]
+            ).fetchall()
+            if query_vector is None:
+                scored = [(argument_id, -rank) for argument_id, _, rank in matches]
+            else:
+                scored = self._score_candidates(vectors, [(argument_id, row) for argument_id, row, _ in matches], query_vector, request.limit)
+        elif query_vector is not None and filters:
+            scored = self._search_filtered_ivf(connection, ivf, vectors, query_vector, filters, params, request.limit) if ivf else None
+            if scored is None:
+                candidates = connection.execute(
+                    f"""SELECT g.id, g.vector_row FROM arguments g JOIN analyses a ON a.id = g.analysis_id
+                    WHERE g.vector_row IS NOT NULL{filters} LIMIT ?""",
+                    [*params, self.MAX_FILTER_CANDIDATES]
+                ).fetchall()
+                scored = self._score_candidates(vectors, candidates, query_vector, request.limit)
+        elif query_vector is not None:
+            scored = self._rows_to_ids(connection, *self._ranked_rows(ivf, vectors, query_vector, request.limit))
+        else:
+            latest = connection.execute(
+                f"""SELECT g.id FROM arguments g JOIN analyses a ON a.id = g.analysis_id
+                WHERE 1 = 1{filters} ORDER BY g.id DESC LIMIT ?""",
+                [*params, request.limit]
+            ).fetchall()
+            scored = [(argument_id, None) for (argument_id,) in latest]
+        return self._hydrate(connection, scored)
+
+    async def search(self, request: ArgumentSearchRequest) -> ArgumentSearchResponse:
+        """
+        Search indexed arguments. A full-text query and a similarity text can be combined, in which case full-text
+        matches are re-ranked by similarity. Without either, the most recently indexed matching arguments are returned.
+        """
+        start = time.perf_counter()
+        query_vector = await embedding_service.embed_text(request.similar_to) if request.similar_to else None
+        results = await asyncio.to_thread(self._search, request, query_vector)
+        return ArgumentSearchResponse(results=results, took_ms=(time.perf_counter() - start) * 1000)
+
+argument_index = ArgumentIndex(settings.argument_index_dir)
@@ -0,0 +1,265 @@
+import os
+import re
+import uuid
+import asyncio
+import itertools
+from contextlib import aclosing
+from datetime import datetime
+from statistics import mean
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.serialization import load_model_from_file, save_model_to_file
+from app.models.autotune import AutotuneGrid, AutotuneJob, AutotuneObjective, AutotuneRequest, AutotuneStatus, AutotuneTrial
+from app.models.llm_models import ModelGenerationParams
+from app.services.analyzer_registry import analyzer_registry
+from app.services.client_manager import client_manager, current_client
+from app.services.generation_scheduler import generation_scheduler
+from app.services.metrics_calback_handler import MetricsCallbackHandler
+from app.services.ollama_manager import ollama_manager
+from app.services.prompt_manager import prompt_manager
+from app.services.text_analyzer import TextAnalyzer
+from app.services.token_estimator import token_estimator
+from app.services.work_tracker import work_tracker
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Short argumentative texts of different lengths, used when the request doesn't bring its own workload
+SAMPLE_WORKLOAD = [
+    "Remote work should remain an option for office staff. Surveys of several large employers found that employees "
+    "working from home completed as many tasks as their colleagues in the office, and reported fewer sick days. "
+    "Since commuting is also one of the largest sources of household emissions, keeping remote work benefits both "
+    "companies and the environment.",
+    "The city should build a new bike lane on Main Street. Since the lane on Oak Avenue opened, cycling there has "
+    "doubled and collisions involving cyclists have dropped by a third. Local shop owners feared losing customers "
+    "who drive, but their sales went up in the year after the lane opened, likely because people on bikes stop more "
+    "often. Main Street has the same mix of shops and traffic, so the same results can be expected. Critics argue "
+    "the lane will make congestion worse, but the traffic counts on Oak Avenue show car journeys took no longer "
+    "than before."
+]
+
+# Whether a higher value is better for each objective, which is chosen on the trial field of the same name
+OBJECTIVES = {
+    AutotuneObjective.TOKENS_PER_SECOND: True,
+    AutotuneObjective.TIME_TO_FIRST_TOKEN: False,
+    AutotuneObjective.TOTAL_DURATION: False
+}
+
+def _mean_of(metrics: List[Dict[str, Any]], key: str) -> Optional[float]:
+    values = [m[key] for m in metrics if m.get(key) is not None]
+    return mean(values) if values else None
+
+class Autotuner:
+    """
+    Benchmarks a model over a grid of performance options and recommends the fastest configuration.
+
+    Every combination of the grid's options, on top of the model's saved configuration, is run over a sample workload
+    with the prompt of an application. Each configuration is timed with the metrics Ollama reports through the
+    MetricsCallbackHandler, and its output is parsed as the application would parse it, so a configuration that is
+    fast but truncates or garbles the result isn't recommended. The load time of a configuration comes from its first
+    run, since changing num_ctx, num_thread or num_gpu makes Ollama reload the model, and the speed metrics are
+    averaged over the runs after it once the model is warm.
+
+    With adaptive context enabled, every analysis picks its context window from the context buckets, so a tuned
+    context_length would be ignored. The context length is then left out of the grid, which the report notes, and each
+    run uses the bucket a real analysis of its text would get.
+
+    Benchmark generations go through the generation scheduler and are charged to the client that started the job, like
+    any analysis. Other traffic on the same Ollama server skews the measurements, so jobs are best run on an idle host.
+    Jobs run in the background and their reports are stored as JSON files in reports_dir.
+    """
+    def __init__(self, reports_dir: str):
+        self.reports_dir = reports_dir
+        self.jobs: Dict[str, AutotuneJob] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        os.makedirs(self.reports_dir, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.reports_dir, f"{job_id}.json")
+
+    def _save(self, job: AutotuneJob):
+        try:
+            save_model_to_file(self._path(job.job_id), job)
+        except Exception as e:
+            print(f"Error saving autotune report '{job.job_id}': {e}")
+
+    def get_job(self, job_id: str, client_id: str) -> Optional[AutotuneJob]:
+        """Retrieve a job started by the client, with its report so far."""
+        if not JOB_ID.match(job_id):
+            return None
+        job = self.jobs.get(job_id)
+        if not job:
+            try:
+                job = load_model_from_file(self._path(job_id), AutotuneJob)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                print(f"Error loading autotune report '{job_id}': {e}")
+                return None
+            self.jobs[job_id] = job
+        return job if job.client_id == client_id else None
+
+    def build_grid(self, baseline: ModelGenerationParams, grid: AutotuneGrid) -> List[ModelGenerationParams]:
+        """
+        Every combination of the grid's options applied to the baseline configuration. The context length is only
+        swept when adaptive context is disabled.
+        """
+        cpu_count = os.cpu_count() or 1
+        options = {
+            'context_length': (not settings.adaptive_context and grid.context_length) or [baseline.context_length],
+            'thread_count': grid.thread_count or list(dict.fromkeys([baseline.thread_count, None, max(cpu_count // 2, 1), cpu_count])),
+            'gpu_count': grid.gpu_count or [baseline.gpu_count],
+            'keep_alive': grid.keep_alive or [baseline.keep_alive]
+        }
+        return [
+            baseline.model_copy(update=dict(zip(options, values)))
+            for values in itertools.product(*(dict.fromkeys(values) for values in options.values()))
+        ]
+
+    async def start(self, model_name: str, request: AutotuneRequest, client_id: str) -> AutotuneJob:
+        """Validate the request and start the job in the background."""
+        if not await ollama_manager.is_model_available(model_name):
+            raise ValueError(f"Model '{model_name}' is not available")
+        analyzer = analyzer_registry.get(request.application)
+        if not analyzer:
+            raise ValueError(f"No analyzer for {request.application.value}")
+
+        prompt_name = request.prompt_name or prompt_manager.get_default_prompt_name(request.application)
+        prompt = prompt_manager.get_prompt(prompt_name) if prompt_name else None
+        if not prompt:
+            raise ValueError(f"Prompt '{prompt_name}' not found")
+        if prompt.application != request.application:
+            raise ValueError(f"Prompt '{prompt_name}' is for {prompt.application.value}, not {request.application.value}")
+
+        baseline = ollama_manager.get_model_configuration(model_name).model_copy()
+        configurations = self.build_grid(baseline, request.grid)
+        if len(configurations) > settings.autotune_max_trials:
+            raise ValueError(f"Grid has {len(configurations)} configurations, the maximum is {settings.autotune_max_trials}")
+
+        notes = []
+        if settings.adaptive_context and request.grid.context_length:
+            notes.append(
+                "context_length was not swept: adaptive context is enabled, so analyses pick their context window from "
+                "the context buckets and ignore the configured context_length. Runs used the bucket each text would get."
+            )
+
+        job = AutotuneJob(
+            job_id=uuid.uuid4().hex,
+            model_name=model_name,
+            client_id=client_id,
+            request=request.model_copy(update={'prompt_name': prompt_name}),
+            baseline=baseline,
+            trials_total=len(configurations),
+            notes=notes
+        )
+        self.jobs[job.job_id] = job
+        self._save(job)
+        # The task inherits the current client, which its generations are scheduled and charged as
+        task = asyncio.create_task(self._run(job, analyzer, configurations))
+        self.tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job.job_id, None))
+        return job
+
+    async def _benchmark(self, llm, prompt_text: str, prompt_tokens: int, analyzer: TextAnalyzer) -> Tuple[Dict[str, Any], bool]:
+        """Run one generation to completion and return its metrics and whether its output parsed into a valid result."""
+        metrics_callback = MetricsCallbackHandler()
+        client = current_client.get()
+        chunks = []
+        with client_manager.metered(prompt_tokens, llm.num_predict, metrics_callback):
+            async with generation_scheduler.slot(client.client_id, client.weight, prompt_tokens + (llm.num_predict or 0)):
+                with work_tracker.wasted_on_cancel(prompt_tokens, metrics_callback):
+                    async with aclosing(llm.astream(prompt_text, config={"callbacks": [metrics_callback]})) as stream:
+                        async for chunk in stream:
+                            chunks.append(chunk)
+        if not metrics_callback.completed:
+            raise RuntimeError("Generation ended without statistics from Ollama")
+        return metrics_callback.metrics, analyzer.parse_response("".join(chunks)) is not None
+
+    async def _run_trial(self, job: AutotuneJob, analyzer: TextAnalyzer, generation_params: ModelGenerationParams) -> AutotuneTrial:
+        """Benchmark one configuration over the workload."""
+        prompt_template = prompt_manager.create_langchain_prompt(job.request.prompt_name)
+        texts = job.request.sample_texts or SAMPLE_WORKLOAD
+        trial = AutotuneTrial(generation_params=generation_params)
+
+        metrics: List[Dict[str, Any]] = []
+        parsed = 0
+        for _ in range(job.request.repetitions):
+            for text in texts:
+                prompt_text = prompt_template.format(text=text)
+                prompt_tokens = token_estimator.estimate_tokens(job.model_name, prompt_text)
+                run_params = generation_params
+                if settings.adaptive_context:
+                    response_tokens = token_estimator.expected_response_tokens(job.model_name, job.request.prompt_name, generation_params.max_tokens)
+                    num_ctx = token_estimator.select_context_bucket(prompt_tokens, response_tokens, generation_params.context_length)
+                    run_params = generation_params.model_copy(update={'context_length': num_ctx})
+                llm = ollama_manager.create_model_instance(job.model_name, run_params)
+                try:
+                    run_metrics, success = await self._benchmark(llm, prompt_text, prompt_tokens, analyzer)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Autotune run failed for {generation_params.model_dump(include={'context_length', 'thread_count', 'gpu_count', 'keep_alive'})}: {e}")
+                    trial.errors += 1
+                    trial.error = str(e)
+                    continue
+                metrics.append(run_metrics)
+                parsed += success
+
+        if metrics:
+            # The first run pays for loading the model with this configuration, the rest measure it warm
+            warm = metrics[1:] or metrics
+            trial.runs = len(metrics)
+            trial.parse_success_rate = parsed / len(metrics)
+            trial.load_duration = metrics[0].get('load_duration')
+            trial.mean_load_duration = _mean_of(metrics, 'load_duration')
+            trial.time_to_first_token = _mean_of(warm, 'time_to_first_token')
+            trial.tokens_per_second = _mean_of(warm, 'tokens_per_second')
+            trial.prompt_tokens_per_second = _mean_of(warm, 'prompt_tokens_per_second')
+            trial.total_duration = _mean_of(warm, 'total_duration')
+        return trial
+
+    def recommend(self, trials: List[AutotuneTrial], objective: AutotuneObjective, min_parse_success_rate: float) -> Optional[AutotuneTrial]:
+        """Best trial by the objective among those that completed without errors and met the parse success rate."""
+        eligible = [
+            trial for trial in trials
+            if trial.runs and not trial.errors and trial.parse_success_rate >= min_parse_success_rate
+            and getattr(trial, objective.value) is not None
+        ]
+        if not eligible:
+            return None
+        pick = max if OBJECTIVES[objective] else min
+        return pick(eligible, key=lambda trial: getattr(trial, objective.value))
+
+    async def _run(self, job: AutotuneJob, analyzer: TextAnalyzer, configurations: List[ModelGenerationParams]):
+        job.status = AutotuneStatus.RUNNING
+        self._save(job)
+        try:
+            for generation_params in configurations:
+                job.trials.append(await self._run_trial(job, analyzer, generation_params))
+                self._save(job)
+
+            job.recommended = self.recommend(job.trials, job.request.objective, job.request.min_parse_success_rate)
+            if not job.recommended:
+                job.error = "No configuration completed the workload with the required parse success rate"
+            elif job.request.apply:
+                job.applied = ollama_manager.save_model_configuration(job.model_name, job.recommended.generation_params.model_copy())
+            job.status = AutotuneStatus.COMPLETED
+        except asyncio.CancelledError:
+            job.status = AutotuneStatus.CANCELLED
+            raise
+        except Exception as e:
+            print(f"Autotune job '{job.job_id}' failed: {e}")
+            job.status = AutotuneStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            self._save(job)
+
+    async def cancel_all(self):
+        """Cancel the running jobs, e.g. on shutdown. Their reports keep the trials finished so far."""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+autotuner = Autotuner(settings.autotune_reports_dir)
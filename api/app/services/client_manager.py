@@ -0,0 +1,222 @@
+import os
+import time
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.serialization import load_model_from_file
+from app.models.clients import ClientConfig, ClientsFile, ClientUsage
+
+ANONYMOUS_CLIENT = ClientConfig(client_id="anonymous")
+
+# Client making the current request. Tasks started while handling a request (coalesced generations, the applications
+# of a composite analysis, ...) inherit it, so generations are scheduled and charged to the client that started them.
+current_client: ContextVar[ClientConfig] = ContextVar("current_client", default=ANONYMOUS_CLIENT)
+
+class QuotaExceeded(Exception):
+    """The client has used up its token quota."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Token bucket rate limit, O(1) per generation. A generation is admitted when the bucket holds its worst-case cost
+    (estimated prompt plus max_tokens), which is taken out up front, so concurrent generations can't overdraw the
+    bucket. The difference with the actual usage is given back or taken out once the generation ends. A generation
+    costing more than the bucket's capacity is admitted when the bucket is full, and leaves it in debt until it refills.
+    """
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def seconds_until_available(self, tokens: float = 1) -> float:
+        """Time until the bucket holds the given number of tokens (at most its capacity), 0 if it does now."""
+        tokens = min(tokens, self.capacity)
+        missing = tokens - self.available()
+        return 0.0 if missing <= 0 else missing / self.rate_per_second
+
+    def consume(self, tokens: int):
+        self._refill()
+        self.tokens -= tokens
+
+@dataclass
+class UsageCounters:
+    requests: int = 0
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+    throttled: int = 0
+    queued: int = 0
+    queue_wait_seconds: float = 0.0
+    day: str = ""
+    daily_tokens_used: int = 0
+    reserved_tokens: int = 0
+
+class ClientManager:
+    """
+    API clients, their token quotas and their usage.
+
+    Clients are loaded from clients_file. When no clients are configured, authentication is disabled and every
+    request is made as the anonymous client, which has no quota.
+    """
+    def __init__(self, clients_file: str):
+        self.clients_file = clients_file
+        self.clients_by_key: Dict[str, ClientConfig] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.usage: Dict[str, UsageCounters] = {}
+        self._load_clients()
+
+    def _load_clients(self):
+        if not os.path.exists(self.clients_file):
+            return
+        try:
+            clients = load_model_from_file(self.clients_file, ClientsFile).clients
+        except Exception as e:
+            print(f"Error loading clients file {self.clients_file}: {e}")
+            raise
+        for client in clients:
+            if not client.api_key_sha256:
+                print(f"Client '{client.client_id}' has no API key and can't authenticate")
+                continue
+            self.clients_by_key[client.api_key_sha256.lower()] = client
+            if client.tokens_per_minute:
+                self.buckets[client.client_id] = TokenBucket(client.tokens_per_minute / 60, client.burst_tokens or client.tokens_per_minute)
+        print(f"Loaded {len(self.clients_by_key)} API clients")
+
+    @property
+    def authentication_enabled(self) -> bool:
+        return bool(self.clients_by_key)
+
+    def authenticate(self, api_key: Optional[str]) -> Optional[ClientConfig]:
+        """Return the client an API key belongs to. Every request is anonymous when authentication is disabled."""
+        if not self.authentication_enabled:
+            return ANONYMOUS_CLIENT
+        if not api_key:
+            return None
+        return self.clients_by_key.get(hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+
+    def _usage(self, client_id: str) -> UsageCounters:
+        usage = self.usage.setdefault(client_id, UsageCounters())
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        if usage.day != today:
+            usage.day = today
+            usage.daily_tokens_used = 0
+        return usage
+
+    def _check_quota(self, client: ClientConfig, usage: UsageCounters, tokens: int):
+        """Raise QuotaExceeded if the client can't spend the given number of tokens now."""
+        if client.daily_token_quota and usage.daily_tokens_used + usage.reserved_tokens + tokens > client.daily_token_quota:
+            usage.throttled += 1
+            now = datetime.now(timezone.utc)
+            seconds_to_midnight = 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+            raise QuotaExceeded(f"Daily token quota of {client.daily_token_quota} exceeded", seconds_to_midnight)
+
+        bucket = self.buckets.get(client.client_id)
+        if bucket:
+            retry_after = bucket.seconds_until_available(tokens)
+            if retry_after > 0:
+                usage.throttled += 1
+                raise QuotaExceeded(f"Token rate limit of {client.tokens_per_minute} tokens per minute exceeded", retry_after)
+
+    def admit(self, client: ClientConfig):
+        """
+        Admit an analysis request, or raise QuotaExceeded if the client is over its rate limit or daily quota. This
+        only rejects requests early, each generation of the request then reserves its own cost (see metered).
+        """
+        usage = self._usage(client.client_id)
+        self._check_quota(client, usage, 1)
+        usage.requests += 1
+
+    def reserve(self, client: ClientConfig, tokens: int):
+        """Reserve the worst-case cost of a generation against the client's quotas, or raise QuotaExceeded."""
+        usage = self._usage(client.client_id)
+        self._check_quota(client, usage, tokens)
+        usage.reserved_tokens += tokens
+        bucket = self.buckets.get(client.client_id)
+        if bucket:
+            bucket.consume(tokens)
+
+    def settle(self, client_id: str, reserved_tokens: int, prompt_tokens: int, eval_tokens: int):
+        """Replace a generation's reservation with the tokens it actually used."""
+        usage = self._usage(client_id)
+        usage.reserved_tokens = max(usage.reserved_tokens - reserved_tokens, 0)
+        usage.prompt_tokens += prompt_tokens
+        usage.eval_tokens += eval_tokens
+        usage.daily_tokens_used += prompt_tokens + eval_tokens
+        bucket = self.buckets.get(client_id)
+        if bucket:
+            bucket.consume(prompt_tokens + eval_tokens - reserved_tokens)
+
+    @contextmanager
+    def metered(self, estimated_prompt_tokens: int, max_tokens: Optional[int], metrics_callback):
+        """
+        Reserve the worst-case cost of the generation in the block for the current client, raising QuotaExceeded if
+        the client can't afford it, and settle it with the actual usage once the generation ends. Generations that
+        are stopped early or cancelled are charged too, using prompt_eval_count and eval_count or, when Ollama didn't
+        report them, the prompt estimate and the number of tokens streamed. A generation cancelled before it started
+        (e.g. while waiting for a slot) costs nothing.
+        """
+        client = current_client.get()
+        reserved_tokens = estimated_prompt_tokens + (max_tokens or 0)
+        self.reserve(client, reserved_tokens)
+        try:
+            yield
+        finally:
+            metrics = metrics_callback.metrics
+            started = metrics_callback.start_time is not None
+            self.settle(
+                client.client_id,
+                reserved_tokens,
+                (metrics.get('prompt_eval_count') or estimated_prompt_tokens) if started else 0,
+                (metrics.get('eval_count') or metrics_callback.token_count) if started else 0
+            )
+
+    def record_queue_wait(self, client_id: str, seconds: float):
+        usage = self._usage(client_id)
+        usage.queued += 1
+        usage.queue_wait_seconds += seconds
+
+    def get_usage(self, client: ClientConfig) -> List[ClientUsage]:
+        """Usage of every client for admins and when authentication is disabled, otherwise only the client's own."""
+        if client.admin or not self.authentication_enabled:
+            client_ids = sorted(set(self.usage) | {c.client_id for c in self.clients_by_key.values()})
+        else:
+            client_ids = [client.client_id]
+
+        configs = {c.client_id: c for c in self.clients_by_key.values()}
+        results = []
+        for client_id in client_ids:
+            usage = self._usage(client_id)
+            bucket = self.buckets.get(client_id)
+            results.append(ClientUsage(
+                client_id=client_id,
+                requests=usage.requests,
+                prompt_tokens=usage.prompt_tokens,
+                eval_tokens=usage.eval_tokens,
+                total_tokens=usage.prompt_tokens + usage.eval_tokens,
+                throttled=usage.throttled,
+                queued=usage.queued,
+                queue_wait_seconds=usage.queue_wait_seconds,
+                available_tokens=bucket.available() if bucket else None,
+                reserved_tokens=usage.reserved_tokens,
+                daily_tokens_used=usage.daily_tokens_used,
+                daily_token_quota=configs[client_id].daily_token_quota if client_id in configs else None
+            ))
+        return results
+
+client_manager = ClientManager(settings.clients_file)
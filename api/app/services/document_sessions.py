@@ -0,0 +1,240 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.serialization import load_model_from_file, save_model_to_file
+from app.models.analysis import AnalysisResponse, ApplicationType
+from app.models.argument_analysis import ArgumentAnalysisResult
+from app.models.documents import DocumentAnalysisRequest, DocumentAnalysisResponse, DocumentSegment, DocumentSession
+from app.services.argument_analyzer import argument_analyzer
+from app.services.prompt_manager import prompt_manager
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+MAX_SEGMENT_FACTOR = 4 # Segments are cut once they reach this many times min_chars, whatever their paragraphs' hashes
+
+def _ends_segment(paragraph: str, min_chars: int) -> bool:
+    """
+    Whether a segment ends after this paragraph. Paragraphs of at least min_chars always end one. A shorter paragraph
+    ends one with a probability proportional to its length, drawn from its own hash, so headings and one-liners are
+    almost always joined with what follows and segments average about min_chars.
+    """
+    if len(paragraph) >= min_chars:
+        return True
+    draw = int.from_bytes(hashlib.sha256(paragraph.encode("utf-8")).digest()[:8], "big") / 2 ** 64
+    return draw < len(paragraph) / min_chars
+
+def segment_text(text: str, min_chars: int) -> List[str]:
+    """
+    Split a document into segments on paragraph breaks, with content-defined boundaries: whether a segment ends
+    after a paragraph depends only on that paragraph (see _ends_segment), not on where the previous segment ended.
+    An edit, insertion or deletion therefore only changes the segment it falls in (and the next one if it changes
+    whether a boundary falls there), and the segments after it are unchanged. The only boundaries that depend on
+    position are the rare cuts of a long run of short paragraphs at MAX_SEGMENT_FACTOR times min_chars.
+    """
+    segments = []
+    current: List[str] = []
+    length = 0
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        current.append(paragraph)
+        length += len(paragraph)
+        if _ends_segment(paragraph, min_chars) or length >= min_chars * MAX_SEGMENT_FACTOR:
+            segments.append("\n\n".join(current))
+            current, length = [], 0
+    if current:
+        segments.append("\n\n".join(current))
+    return segments
+
+def merge_results(segments: List[DocumentSegment]) -> ArgumentAnalysisResult:
+    """
+    Merge segment results into a result for the whole document. Arguments are kept in document order, and the
+    credibility score is the average of the segments' scores weighted by their number of arguments (by length when
+    no segment found any).
+    """
+    analyzed = [segment for segment in segments if segment.success]
+    arguments = [argument for segment in analyzed for argument in segment.result.arguments]
+
+    weights = [(segment.result.argument_count, segment) for segment in analyzed]
+    if not any(weight for weight, _ in weights):
+        weights = [(segment.length, segment) for segment in analyzed]
+    total_weight = sum(weight for weight, _ in weights)
+    credibility_score = sum(weight * segment.result.credibility_score for weight, segment in weights) / total_weight if total_weight else 0.0
+
+    assessments = [segment.result.overall_assessment for segment in analyzed if segment.result.overall_assessment]
+    return ArgumentAnalysisResult(
+        arguments=arguments,
+        overall_assessment="\n\n".join(assessments) or "Analysis failed - consider possible model or prompt issues.",
+        credibility_score=credibility_score,
+        argument_count=len(arguments),
+        well_supported_arguments=sum(segment.result.well_supported_arguments for segment in analyzed)
+    )
+
+class DocumentSessionManager:
+    """
+    Incremental argument analysis of documents that are revised and resubmitted.
+
+    A session keeps the latest revision of a document as hashed segments and their results. When a new revision is
+    submitted, segments whose hash is unchanged reuse their previous result, and only new or changed segments are
+    analyzed, concurrently. The cost of re-analysis scales with the size of the edit rather than the document.
+
+    Sessions are stored as JSON files in sessions_dir, which are the source of truth. The most recently used sessions
+    are also kept in memory, up to cache_size. Analyses and deletions of a session are serialized on a per-session
+    lock, which is dropped once nobody holds or waits for it.
+    """
+    def __init__(self, sessions_dir: str, cache_size: int):
+        self.sessions_dir = sessions_dir
+        self.cache_size = cache_size
+        self.sessions: OrderedDict[str, DocumentSession] = OrderedDict()
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.lock_users: Dict[str, int] = {}
+        os.makedirs(self.sessions_dir, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.sessions_dir, f"{session_id}.json")
+
+    def _cache(self, session: DocumentSession):
+        """Keep a session in memory, evicting the least recently used one once the cache is full."""
+        self.sessions[session.session_id] = session
+        self.sessions.move_to_end(session.session_id)
+        while len(self.sessions) > self.cache_size:
+            self.sessions.popitem(last=False)
+
+    @asynccontextmanager
+    async def _session_lock(self, session_id: str):
+        """Hold the session's lock for the duration of the block."""
+        lock = self.locks.setdefault(session_id, asyncio.Lock())
+        self.lock_users[session_id] = self.lock_users.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self.lock_users[session_id] -= 1
+            if not self.lock_users[session_id]:
+                del self.lock_users[session_id]
+                del self.locks[session_id]
+
+    def get_session(self, session_id: str, client_id: str) -> Optional[DocumentSession]:
+        """Retrieve a session owned by the client."""
+        if not SESSION_ID.match(session_id):
+            return None
+        session = self.sessions.get(session_id)
+        if session:
+            self.sessions.move_to_end(session_id)
+        else:
+            try:
+                session = load_model_from_file(self._path(session_id), DocumentSession)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                print(f"Error loading document session '{session_id}': {e}")
+                return None
+            self._cache(session)
+        return session if session.client_id == client_id else None
+
+    async def delete_session(self, session_id: str, client_id: str) -> bool:
+        """Delete a session owned by the client, once the analysis of the session in progress (if any) has finished."""
+        async with self._session_lock(session_id):
+            if not self.get_session(session_id, client_id):
+                return False
+            self.sessions.pop(session_id, None)
+            os.remove(self._path(session_id))
+            return True
+
+    async def _analyze_segment(self, text: str, request: DocumentAnalysisRequest, prompt_name: str) -> AnalysisResponse:
+        try:
+            return await argument_analyzer.analyze_text(text, request.model_name, prompt_name, request.generation_params)
+        except Exception as e:
+            print(f"Error analyzing document segment: {e}")
+            return AnalysisResponse(
+                model_used=request.model_name,
+                success=False,
+                application=ApplicationType.ARGUMENT_ANALYSIS,
+                timestamp=time.time(),
+                error=str(e)
+            )
+
+    async def analyze(self, request: DocumentAnalysisRequest, client_id: str) -> DocumentAnalysisResponse:
+        """Analyze a revision of a document, reusing the results of the segments unchanged since the previous revision."""
+        start = time.perf_counter_ns()
+        prompt_name = request.prompt_name or prompt_manager.get_default_prompt_name(ApplicationType.ARGUMENT_ANALYSIS)
+        if not prompt_name or not prompt_manager.get_prompt(prompt_name):
+            raise ValueError(f"Prompt '{prompt_name}' not found")
+        analysis_key = argument_analyzer.analysis_key(request.model_name, prompt_name, request.generation_params)
+
+        session_id = request.session_id or uuid.uuid4().hex
+        async with self._session_lock(session_id):
+            session = self.get_session(session_id, client_id) if request.session_id else None
+            if request.session_id and not session:
+                raise ValueError(f"Document session '{request.session_id}' not found")
+
+            # Results are only reusable if they were produced by the same model, prompt version and parameters
+            previous: Dict[str, DocumentSegment] = {}
+            if session and session.analysis_key == analysis_key:
+                for segment in session.segments:
+                    if segment.success:
+                        previous.setdefault(segment.text_hash, segment)
+
+            texts = segment_text(request.text, settings.document_segment_min_chars)
+            hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+            changed = {text_hash: text for text_hash, text in zip(hashes, texts) if text_hash not in previous}
+
+            responses = await asyncio.gather(*(self._analyze_segment(text, request, prompt_name) for text in changed.values()))
+            analyzed = {
+                text_hash: DocumentSegment(
+                    text_hash=text_hash,
+                    length=len(text),
+                    success=response.success,
+                    result=response.result if response.success else None
+                )
+                for (text_hash, text), response in zip(changed.items(), responses)
+            }
+            segments = [previous.get(text_hash) or analyzed[text_hash] for text_hash in hashes]
+
+            session = DocumentSession(
+                session_id=session_id,
+                client_id=client_id,
+                revision=session.revision + 1 if session else 1,
+                analysis_key=analysis_key,
+                model_name=request.model_name,
+                prompt_name=prompt_name,
+                segments=segments,
+                created_at=session.created_at if session else datetime.now()
+            )
+            save_model_to_file(self._path(session_id), session)
+            self._cache(session)
+
+        reused = [segment for text_hash, segment in zip(hashes, segments) if text_hash in previous]
+        characters_reused = sum(segment.length for segment in reused)
+        characters_total = sum(segment.length for segment in segments)
+        statistics = [response.statistics for response in responses if response.statistics]
+        return DocumentAnalysisResponse(
+            session_id=session_id,
+            revision=session.revision,
+            model_used=request.model_name,
+            success=all(segment.success for segment in segments),
+            result=merge_results(segments),
+            segments_total=len(segments),
+            segments_reused=len(reused),
+            segments_analyzed=len(segments) - len(reused),
+            characters_reused=characters_reused,
+            characters_analyzed=characters_total - characters_reused,
+            reuse_ratio=characters_reused / characters_total if characters_total else 0.0,
+            prompt_tokens=sum(stats.prompt_eval_count for stats in statistics),
+            eval_tokens=sum(stats.eval_count for stats in statistics),
+            total_duration=time.perf_counter_ns() - start,
+            segment_responses=list(responses)
+        )
+
+document_sessions = DocumentSessionManager(settings.document_sessions_dir, settings.document_sessions_cache_size)
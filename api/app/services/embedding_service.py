@@ -0,0 +1,29 @@
+from typing import List, Optional
+import numpy as np
+from langchain_ollama import OllamaEmbeddings
+
+from app.core.config import settings
+
+class EmbeddingService:
+    """Local text embeddings through Ollama, returned as unit-length float32 vectors ready for dot-product search."""
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._embeddings: Optional[OllamaEmbeddings] = None
+
+    def _get_embeddings(self) -> OllamaEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = OllamaEmbeddings(model=self.model_name, base_url=settings.ollama_base_url)
+        return self._embeddings
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dim) matrix of normalized vectors."""
+        vectors = np.asarray(await self._get_embeddings().aembed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    async def embed_text(self, text: str) -> np.ndarray:
+        """Embed a single text into a normalized vector."""
+        return (await self.embed_texts([text]))[0]
+
+embedding_service = EmbeddingService(settings.embedding_model)
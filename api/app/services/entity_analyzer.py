@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+from app.models.analysis import ApplicationType
+from app.models.entity_extraction import EntityExtractionResult
+from app.services.text_analyzer import TextAnalyzer
+
+
+class EntityAnalyzer(TextAnalyzer):
+    """ Text Analysis Service extracting the named entities mentioned in a text. """
+    application = ApplicationType.ENTITY_EXTRACTION
+    result_model = EntityExtractionResult
+
+    def _generate_fallback_response(self) -> EntityExtractionResult:
+        """ Generate a fallback response in case of analysis failure. """
+        return EntityExtractionResult(
+            entities=[],
+            entity_count=0
+        )
+
+    def _normalize_result_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Recompute entity_count from the extracted entities."""
+        if isinstance(data.get('entities'), list):
+            data['entity_count'] = len(data['entities'])
+        return data
+
+entity_analyzer = EntityAnalyzer()
@@ -0,0 +1,80 @@
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.services.client_manager import client_manager
+
+class GenerationScheduler:
+    """
+    Shared budget of concurrent generations sent to Ollama. Every analysis, including each application of a
+    composite analysis, holds a slot for the duration of its generation, so total load on the model stays bounded
+    however requests are combined.
+
+    When generations have to wait, slots are handed out by weighted fair queuing across clients. Each generation is
+    tagged with a virtual finish time, its client's previous finish time (or the current virtual time if the client
+    was idle) plus its estimated token cost divided by the client's weight, and the waiting generation with the
+    earliest finish time goes next. A client submitting a large batch then only delays its own queue, and other
+    clients get model time in proportion to their weights.
+    """
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.waiting = 0
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self._queue: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _tag(self, client_id: str, weight: float, cost: int) -> Tuple[float, float]:
+        """Virtual start and finish times of a generation."""
+        start = max(self.virtual_time, self.last_finish.get(client_id, 0.0))
+        finish = start + max(cost, 1) / weight
+        self.last_finish[client_id] = finish
+        return start, finish
+
+    def _release(self):
+        """Hand the slot to the waiting generation with the earliest finish time, or free it."""
+        while self._queue:
+            _, _, start, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self.virtual_time = max(self.virtual_time, start)
+            future.set_result(None)
+            return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, client_id: str = "anonymous", weight: float = 1.0, cost: int = 1):
+        """
+        Wait for a generation slot and hold it for the duration of the block.
+        cost is the estimated number of tokens the generation will use (prompt and response).
+        """
+        start, finish = self._tag(client_id, weight, cost)
+        if self.active < self.max_concurrent and not self._queue:
+            self.active += 1
+            self.virtual_time = max(self.virtual_time, start)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (finish, next(self._sequence), start, future))
+            self.waiting += 1
+            queued_at = time.perf_counter()
+            try:
+                await future
+            except asyncio.CancelledError:
+                # The slot may have been handed over just as the waiter was cancelled
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+            finally:
+                self.waiting -= 1
+                client_manager.record_queue_wait(client_id, time.perf_counter() - queued_at)
+        try:
+            yield
+        finally:
+            self._release()
+
+generation_scheduler = GenerationScheduler(settings.max_concurrent_generations)
@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterator, List
+import orjson
+from pydantic import ValidationError
+
+REPAIR_PROMPT = """Repair the JSON below so that it is valid and fixes the listed errors. Keep its content, only change what is needed to fix the errors. Respond with the JSON object only.
+
+Errors:
+{errors}
+
+JSON schema:
+{schema}
+
+JSON to repair:
+{partial}"""
+
+# Pydantic error types for inclusive numeric bounds, and the constraint in the error context holding the bound
+BOUND_ERRORS = {
+    'greater_than_equal': 'ge',
+    'less_than_equal': 'le'
+}
+
+def _strip_trailing_comma(out: List[str]):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+def close_json(text: str) -> str:
+    """
+    Make a JSON object parseable: drop trailing commas before closing brackets, close an unterminated string and
+    close every bracket left open when the output was cut off. Anything after the object closes is ignored.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if not stack:
+                break
+            _strip_trailing_comma(out)
+            out.append(stack.pop())
+            if not stack:
+                return "".join(out)
+            continue
+        out.append(char)
+
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    while stack:
+        _strip_trailing_comma(out)
+        out.append(stack.pop())
+    return "".join(out)
+
+def _comma_positions(text: str) -> List[int]:
+    """Positions of the commas outside strings, last first."""
+    positions = []
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ',':
+            positions.append(i)
+    return positions[::-1]
+
+def repair_candidates(response: str, max_truncations: int = 8) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the JSON objects that can be recovered from a malformed response, most complete first.
+
+    The whole response is tried after closing it. When that doesn't parse, e.g. because the output was cut off in
+    the middle of a key or value, it is cut back to each of the last few commas and closed again, dropping the
+    incomplete trailing element.
+    """
+    start_idx = response.find('{')
+    if start_idx == -1:
+        return
+    text = response[start_idx:]
+
+    for end_idx in [len(text)] + _comma_positions(text)[:max_truncations]:
+        try:
+            data = orjson.loads(close_json(text[:end_idx]))
+        except orjson.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            yield data
+
+def clamp_out_of_range(data: Any, error: ValidationError) -> bool:
+    """Clamp the values that failed a numeric bound to that bound, in place. Returns whether anything was changed."""
+    changed = False
+    for detail in error.errors():
+        constraint = BOUND_ERRORS.get(detail['type'])
+        if not constraint or not detail['loc']:
+            continue
+        container = data
+        try:
+            for key in detail['loc'][:-1]:
+                container = container[key]
+            container[detail['loc'][-1]] = detail['ctx'][constraint]
+            changed = True
+        except (KeyError, IndexError, TypeError):
+            continue
+    return changed
+
+def format_errors(error: ValidationError, limit: int = 20) -> List[str]:
+    """Short, model-readable descriptions of validation errors."""
+    return [
+        f"{'.'.join(str(part) for part in detail['loc']) or '(root)'}: {detail['msg']}"
+        for detail in error.errors()[:limit]
+    ]
@@ -0,0 +1,44 @@
+from typing import List
+
+class JsonObjectWatcher:
+    """
+    Incrementally scans streamed model output for complete top-level JSON objects.
+
+    Chunks are fed as they arrive and every balanced {...} span is returned as soon as its closing brace is seen.
+    Braces inside JSON strings (including escaped quotes) are ignored, so the scan is linear in the output size
+    and never re-reads earlier chunks.
+    """
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume a chunk and return any JSON objects completed by it."""
+        completed = []
+        for char in chunk:
+            if self.depth == 0:
+                if char == '{':
+                    self.depth = 1
+                    self.buffer = [char]
+                continue
+
+            self.buffer.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append("".join(self.buffer))
+                    self.buffer = []
+        return completed
@@ -1,5 +1,6 @@
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain.schema import LLMResult
+from datetime import datetime, timezone
 import time
 
 class MetricsCallbackHandler(BaseCallbackHandler):
@@ -8,6 +9,8 @@ class MetricsCallbackHandler(BaseCallbackHandler):
             "time_to_first_token": None,
         }
         self.start_time = None
+        self.token_count = 0
+        self.completed = False
 
     def on_llm_start(self, serialized, prompts, **kwargs):
         """
@@ -21,6 +24,8 @@ class MetricsCallbackHandler(BaseCallbackHandler):
         current_time = time.perf_counter()
         if (self.metrics['time_to_first_token'] is None):
             self.metrics['time_to_first_token'] = current_time - self.start_time
+        if token:
+            self.token_count += 1
         # NOTE: Exluting this for now to limit response size, but may add it back in later
         #self.metrics['token_timestamps'].append(current_time) 
     
@@ -43,7 +48,7 @@ class MetricsCallbackHandler(BaseCallbackHandler):
             eval_duration = generation_info.get('eval_duration', 0)
             eval_seconds = eval_duration / 1_000_000_000
 
-            context_length = len(generation_info.get('context', []))
+            context_length = len(generation_info['context']) if 'context' in generation_info else generation_info.get('context_length', 0)
             
             performance_metrics.update({
                 'load_time_ratio': load_duration / total_duration,
@@ -75,15 +80,44 @@ class MetricsCallbackHandler(BaseCallbackHandler):
                 generation_chunk = response.generations[0][0]
 
                 if (hasattr(generation_chunk, 'generation_info')):
-                    self.metrics['created_at'] = generation_chunk.generation_info.get('created_at')
-                    self.metrics['total_duration'] = generation_chunk.generation_info.get('total_duration')
-                    self.metrics['load_duration'] = generation_chunk.generation_info.get('load_duration')
-                    self.metrics['prompt_eval_count'] = generation_chunk.generation_info.get('prompt_eval_count')
-                    self.metrics['prompt_eval_duration'] = generation_chunk.generation_info.get('prompt_eval_duration')
-                    self.metrics['eval_count'] = generation_chunk.generation_info.get('eval_count')
-                    self.metrics['eval_duration'] = generation_chunk.generation_info.get('eval_duration')                    
-                    self.metrics.update(self._calculate_performance_benchmarks(generation_chunk.generation_info))
+                    self._record_generation_info(generation_chunk.generation_info)
+                    self.completed = True
                     # TODO: Additional metrics can be added here
         except Exception as e:
             print(f"Error extracting metrics: {e}")
+
+    def _record_generation_info(self, generation_info: dict):
+        """Record the statistics Ollama reports for a generation, along with the derived benchmarks."""
+        self.metrics['created_at'] = generation_info.get('created_at')
+        self.metrics['total_duration'] = generation_info.get('total_duration')
+        self.metrics['load_duration'] = generation_info.get('load_duration')
+        self.metrics['prompt_eval_count'] = generation_info.get('prompt_eval_count')
+        self.metrics['prompt_eval_duration'] = generation_info.get('prompt_eval_duration')
+        self.metrics['eval_count'] = generation_info.get('eval_count')
+        self.metrics['eval_duration'] = generation_info.get('eval_duration')
+        self.metrics.update(self._calculate_performance_benchmarks(generation_info))
+
+    def record_stopped_generation(self, prompt_tokens: int):
+        """
+        Fill in metrics for a generation that was stopped before Ollama sent its final statistics.
+
+        Durations are measured client-side, eval_count is the number of streamed tokens and prompt_eval_count is the
+        caller's estimate. Load time can't be separated from prompt processing, so it is reported as part of it.
+        context_length is the number of tokens in the context (prompt and response), like the length of the context
+        Ollama returns for a completed generation, so the fill rates mean the same for both.
+        """
+        if self.completed or self.start_time is None:
+            return
+        total_duration = int((time.perf_counter() - self.start_time) * 1_000_000_000)
+        prompt_eval_duration = int((self.metrics['time_to_first_token'] or 0) * 1_000_000_000)
+        self._record_generation_info({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'total_duration': total_duration,
+            'load_duration': 0,
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': prompt_eval_duration,
+            'eval_count': self.token_count,
+            'eval_duration': total_duration - prompt_eval_duration,
+            'context_length': prompt_tokens + self.token_count
+        })
             
@@ -1,19 +1,25 @@
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
 import ollama
 import os
-import json
 from langchain_ollama import OllamaLLM #, ChatOllama, OllamaEmbeddings
 
 
 from app.core.config import settings
-from app.models.llm_models import ModelGenerationParams, ModelMetadata, ModelInfo
+from app.core.serialization import load_model_from_file, save_model_to_file
+from app.models.llm_models import ModelGenerationParams, ModelMetadata, ModelInfo, ModelInstanceCacheStats
 
 class OllamaManager:
     """Manager for interacting with Ollama models and provides LangChain integration"""
     def __init__(self, model_configs_dir: str = "model_configurations"):
         self.client = ollama.Client(host=settings.ollama_base_url)
         self.model_configs_dir = model_configs_dir
-        self.llm_instances: Dict[str, OllamaLLM] = {}
+        # LRU of LLM instances keyed on (model name, effective generation params), see _instance_key
+        self.llm_instances: OrderedDict[Tuple[str, Hashable], OllamaLLM] = OrderedDict()
+        self.llm_instance_capacity = settings.llm_instance_cache_size
+        self.llm_instance_hits = 0
+        self.llm_instance_misses = 0
+        self.llm_instance_evictions = 0
         self.model_configurations: Dict[str, ModelGenerationParams] = {}
         self.available_models: Dict[str, ModelInfo] = {}
         
@@ -29,9 +35,7 @@ class OllamaManager:
         """Load a model configuration from a JSON file."""
         try:
             safe_filename = self._sanitize_filename(model_name)
-            with open(os.path.join(self.model_configs_dir, f"{safe_filename}.json"), "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return ModelGenerationParams(**data)
+            return load_model_from_file(os.path.join(self.model_configs_dir, f"{safe_filename}.json"), ModelGenerationParams)
         except FileNotFoundError:
             print(f"Model configuration '{model_name}' not found.")
         except Exception as e:
@@ -58,10 +62,8 @@ class OllamaManager:
     def _save_model_configuration_to_file(self, model_name: str, config: ModelGenerationParams):
         """Save a model configuration to a JSON file."""
         try:
-            config_dict = config.model_dump(mode='json', exclude_none=False, exclude_unset=False) 
-            safe_filename = self._sanitize_filename(model_name)            
-            with open(os.path.join(self.model_configs_dir, f"{safe_filename}.json"), "w", encoding="utf-8") as file:
-                json.dump(config_dict, file, ensure_ascii=False, indent=2)
+            safe_filename = self._sanitize_filename(model_name)
+            save_model_to_file(os.path.join(self.model_configs_dir, f"{safe_filename}.json"), config)
         except Exception as e:
             print(f"Error saving model configuration '{model_name}': {e}")
             raise
@@ -84,8 +86,7 @@ class OllamaManager:
             self.model_configurations[config.ollama_model_name] = config
             if (config.ollama_model_name in self.available_models):
                 self.available_models[config.ollama_model_name].generation_params = config
-            if config.ollama_model_name in self.llm_instances:
-                del self.llm_instances[config.ollama_model_name]
+            self._evict_model_instances(config.ollama_model_name)
             return True
         except Exception as e:
             print(f"Error saving model configuration '{model_name}': {e}")
@@ -111,8 +112,7 @@ class OllamaManager:
         if model_name in self.available_models:
             del self.available_models[model_name]
         
-        if model_name in self.llm_instances:
-            del self.llm_instances[model_name]
+        self._evict_model_instances(model_name)
         
         return success
 
@@ -157,25 +157,84 @@ class OllamaManager:
             print(f"Error fetching models from Ollama: {e}")
             return []
 
-    def get_model_instance(self, model_name: str) -> OllamaLLM:
-        """ Get or create a LangChain Ollama LLM instance with current configuration."""
-        if model_name not in self.llm_instances:
-            generation_params = self.get_model_configuration(model_name)
-
-            self.llm_instances[model_name] = OllamaLLM(
-                model=model_name,
-                base_url=settings.ollama_base_url,
-                temperature=generation_params.temperature,
-                top_p=generation_params.top_p,
-                top_k=generation_params.top_k,
-                num_ctx=generation_params.context_length,
-                repeat_last_n=generation_params.repeat_last_n,
-                repeat_penalty=generation_params.repeat_penalty,
-                num_gpu=generation_params.gpu_count,
-                seed=generation_params.seed,
-                verbose=settings.langchain_verbose
-            )
-        return self.llm_instances[model_name]
+    def _evict_model_instances(self, model_name: str):
+        """Drop every cached LLM instance for a model, regardless of context size or parameter overrides."""
+        for key in [key for key in self.llm_instances if key[0] == model_name]:
+            del self.llm_instances[key]
+
+    def _instance_key(self, model_name: str, generation_params: ModelGenerationParams) -> Tuple[str, Hashable]:
+        """Cache key covering every parameter that is baked into an OllamaLLM instance."""
+        options = generation_params.model_dump(exclude={'ollama_model_name'})
+        return (model_name, tuple(sorted(options.items())))
+
+    def resolve_generation_params(self, model_name: str, overrides: Optional[ModelGenerationParams] = None) -> ModelGenerationParams:
+        """
+        Apply per-request overrides on top of the model's saved configuration. Only the fields explicitly set to a
+        value are applied: null would otherwise lift limits such as max_tokens, which bounds generation and quota use.
+        """
+        generation_params = self.get_model_configuration(model_name)
+        if overrides is None:
+            return generation_params
+        return generation_params.model_copy(update=overrides.model_dump(exclude_unset=True, exclude_none=True, exclude={'ollama_model_name'}))
+
+    def get_instance_cache_stats(self) -> ModelInstanceCacheStats:
+        """Get usage statistics for the LLM instance cache."""
+        return ModelInstanceCacheStats(
+            size=len(self.llm_instances),
+            capacity=self.llm_instance_capacity,
+            hits=self.llm_instance_hits,
+            misses=self.llm_instance_misses,
+            evictions=self.llm_instance_evictions
+        )
+
+    def get_model_instance(
+        self,
+        model_name: str,
+        num_ctx: Optional[int] = None,
+        generation_params: Optional[ModelGenerationParams] = None
+    ) -> OllamaLLM:
+        """
+        Get or create a LangChain Ollama LLM instance with current configuration.
+
+        generation_params replaces the saved configuration (see resolve_generation_params), and num_ctx overrides its
+        context_length, e.g. with a context bucket sized for the request. Instances are shared by every request with
+        the same effective parameters, and the least recently used instance is evicted once the cache is full.
+        """
+        generation_params = generation_params or self.get_model_configuration(model_name)
+        if num_ctx:
+            generation_params = generation_params.model_copy(update={'context_length': num_ctx})
+        key = self._instance_key(model_name, generation_params)
+
+        if key in self.llm_instances:
+            self.llm_instance_hits += 1
+            self.llm_instances.move_to_end(key)
+            return self.llm_instances[key]
+
+        self.llm_instance_misses += 1
+        self.llm_instances[key] = self.create_model_instance(model_name, generation_params)
+        while len(self.llm_instances) > self.llm_instance_capacity:
+            self.llm_instances.popitem(last=False)
+            self.llm_instance_evictions += 1
+        return self.llm_instances[key]
+
+    def create_model_instance(self, model_name: str, generation_params: ModelGenerationParams) -> OllamaLLM:
+        """Create a LangChain Ollama LLM instance outside the instance cache, e.g. for one-off benchmark runs."""
+        return OllamaLLM(
+            model=model_name,
+            base_url=settings.ollama_base_url,
+            temperature=generation_params.temperature,
+            top_p=generation_params.top_p,
+            top_k=generation_params.top_k,
+            num_ctx=generation_params.context_length,
+            num_predict=generation_params.max_tokens,
+            repeat_last_n=generation_params.repeat_last_n,
+            repeat_penalty=generation_params.repeat_penalty,
+            num_gpu=generation_params.gpu_count,
+            num_thread=generation_params.thread_count,
+            keep_alive=generation_params.keep_alive,
+            seed=generation_params.seed,
+            verbose=settings.langchain_verbose
+        )
     
 ollama_manager = OllamaManager()
 
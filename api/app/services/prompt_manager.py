@@ -1,9 +1,10 @@
 import os
-import json
 from typing import Dict, Optional, List
 from langchain.prompts import PromptTemplate
 
 
+from app.core.serialization import load_model_from_file, save_model_to_file
+from app.models.analysis import ApplicationType
 from app.models.prompts import Prompt
 
 class PromptManager:
@@ -22,9 +23,7 @@ class PromptManager:
     def _load_prompt_from_file(self, prompt_name: str) -> Optional[Prompt]:
         """Load a prompt from a JSON file."""
         try:
-            with open(os.path.join(self.prompts_dir, f"{prompt_name}.json"), "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return Prompt(**data) 
+            return load_model_from_file(os.path.join(self.prompts_dir, f"{prompt_name}.json"), Prompt)
         except FileNotFoundError:
             print(f"Prompt '{prompt_name}' not found.")            
         except Exception as e:
@@ -51,6 +50,11 @@ class PromptManager:
             return prompt
         return None
         
+    def get_default_prompt_name(self, application: ApplicationType) -> Optional[str]:
+        """Name of the first prompt (alphabetically) defined for an application, if any."""
+        names = sorted(name for name, prompt in self.prompts.items() if prompt.application == application)
+        return names[0] if names else None
+
     def get_all_prompts(self) -> Dict[str, Prompt]:
         """Refresh cached prompts and return them."""
         self._load_prompts_from_directory()
@@ -59,9 +63,7 @@ class PromptManager:
     def _save_prompt_to_file(self, prompt_name: str, prompt: Prompt):
         """Save a prompt to a JSON file."""        
         try:
-            with open(os.path.join(self.prompts_dir, f"{prompt_name}.json"), "w", encoding="utf-8") as file:
-                json.dump(prompt.model_dump(mode='json'), file, ensure_ascii=False, indent=2)
-                
+            save_model_to_file(os.path.join(self.prompts_dir, f"{prompt_name}.json"), prompt)
         except Exception as e:
             print(f"Error saving prompt '{prompt_name}': {e}")
             raise
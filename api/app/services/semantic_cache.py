@@ -0,0 +1,124 @@
+import os
+import json
+import time
+from typing import Dict, Optional, Tuple, Type, TypeVar
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.serialization import load_model_from_file, save_model_to_file
+
+ResultT = TypeVar("ResultT", bound=BaseModel)
+
+class SemanticCache:
+    """
+    Cache of analysis results keyed on text embeddings, so near-duplicate texts (different boilerplate, light edits)
+    reuse a previous result instead of running inference again.
+
+    The index has a fixed number of slots, which bounds its memory. Each slot belongs to a namespace (model, prompt
+    and generation parameters), and a lookup only matches slots in the request's namespace. When every slot is in
+    use, the least recently used one is overwritten.
+
+    On-disk layout in cache_dir:
+    - vectors.npy: (capacity, dim) float32 embeddings, memory-mapped read/write
+    - slot_namespaces.npy / slot_last_used.npy: per-slot namespace id (-1 when empty) and last use time, memory-mapped
+    - namespaces.json: namespace string to id mapping
+    - results/<slot>.json: the cached analysis result for each slot
+    """
+    def __init__(self, cache_dir: str, capacity: int, threshold: float):
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectors: Optional[np.ndarray] = None
+        self.slot_namespaces: Optional[np.ndarray] = None
+        self.slot_last_used: Optional[np.ndarray] = None
+        self.namespace_ids: Dict[str, int] = {}
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.cache_dir, *parts)
+
+    def _open_index(self, dim: int) -> bool:
+        """Open the memory-mapped index, creating it if needed. Returns False if the stored index can't be used with this dimension."""
+        if self.vectors is not None:
+            return self.vectors.shape[1] == dim
+
+        os.makedirs(self._path("results"), exist_ok=True)
+        vectors_path = self._path("vectors.npy")
+        if os.path.exists(vectors_path):
+            vectors = np.load(vectors_path, mmap_mode="r+")
+            if vectors.shape == (self.capacity, dim):
+                self.vectors = vectors
+                self.slot_namespaces = np.load(self._path("slot_namespaces.npy"), mmap_mode="r+")
+                self.slot_last_used = np.load(self._path("slot_last_used.npy"), mmap_mode="r+")
+                with open(self._path("namespaces.json"), "r", encoding="utf-8") as file:
+                    self.namespace_ids = json.load(file)
+                return True
+            print(f"Semantic cache shape {vectors.shape} doesn't match capacity {self.capacity} and dimension {dim}, rebuilding")
+            del vectors
+
+        self.vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(self.capacity, dim))
+        self.slot_namespaces = np.lib.format.open_memmap(self._path("slot_namespaces.npy"), mode="w+", dtype=np.int32, shape=(self.capacity,))
+        self.slot_namespaces[:] = -1
+        self.slot_last_used = np.lib.format.open_memmap(self._path("slot_last_used.npy"), mode="w+", dtype=np.float64, shape=(self.capacity,))
+        self.namespace_ids = {}
+        self._save_namespaces()
+        return True
+
+    def _save_namespaces(self):
+        with open(self._path("namespaces.json"), "w", encoding="utf-8") as file:
+            json.dump(self.namespace_ids, file, ensure_ascii=False)
+
+    def lookup(self, namespace: str, embedding: np.ndarray, result_model: Type[ResultT]) -> Optional[Tuple[ResultT, float]]:
+        """Return the cached result most similar to the embedding and its cosine similarity, if it meets the threshold."""
+        if not self._open_index(embedding.shape[0]) or namespace not in self.namespace_ids:
+            return None
+
+        candidates = np.flatnonzero(self.slot_namespaces == self.namespace_ids[namespace])
+        if candidates.size == 0:
+            return None
+        similarities = self.vectors[candidates] @ embedding
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            return None
+
+        slot = int(candidates[best])
+        try:
+            result = load_model_from_file(self._path("results", f"{slot}.json"), result_model)
+        except Exception as e:
+            print(f"Error loading semantic cache entry {slot}: {e}")
+            self.slot_namespaces[slot] = -1
+            return None
+        self.slot_last_used[slot] = time.time()
+        return result, similarity
+
+    def insert(self, namespace: str, embedding: np.ndarray, result: BaseModel):
+        """Store a result, overwriting the least recently used slot once the cache is full."""
+        if not self._open_index(embedding.shape[0]):
+            return
+
+        if namespace not in self.namespace_ids:
+            self.namespace_ids[namespace] = len(self.namespace_ids)
+            self._save_namespaces()
+
+        empty = np.flatnonzero(self.slot_namespaces == -1)
+        slot = int(empty[0]) if empty.size else int(np.argmin(self.slot_last_used))
+
+        save_model_to_file(self._path("results", f"{slot}.json"), result)
+        self.vectors[slot] = embedding
+        self.slot_namespaces[slot] = self.namespace_ids[namespace]
+        self.slot_last_used[slot] = time.time()
+        self.flush()
+
+    def flush(self):
+        """Flush memory-mapped changes to disk."""
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.slot_namespaces.flush()
+            self.slot_last_used.flush()
+
+semantic_cache = SemanticCache(
+    settings.semantic_cache_dir,
+    capacity=settings.semantic_cache_capacity,
+    threshold=settings.semantic_cache_threshold
+)
@@ -0,0 +1,21 @@
+from app.models.analysis import ApplicationType
+from app.models.sentiment_analysis import SentimentAnalysisResult, SentimentLabel
+from app.services.text_analyzer import TextAnalyzer
+
+
+class SentimentAnalyzer(TextAnalyzer):
+    """ Text Analysis Service focused on overall and aspect-level sentiment. """
+    application = ApplicationType.SENTIMENT_ANALYSIS
+    result_model = SentimentAnalysisResult
+
+    def _generate_fallback_response(self) -> SentimentAnalysisResult:
+        """ Generate a fallback response in case of analysis failure. """
+        return SentimentAnalysisResult(
+            overall_sentiment=SentimentLabel.NEUTRAL,
+            sentiment_score=0.0,
+            confidence_score=0.0,
+            aspects=[],
+            rationale="Analysis failed - consider possible model or prompt issues."
+        )
+
+sentiment_analyzer = SentimentAnalyzer()
@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+class Flight:
+    """A unit of in-flight work shared by every caller with the same key."""
+    def __init__(self, key: str):
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.chunks: List[str] = []
+        self.listeners: List[asyncio.Queue] = []
+
+    def publish(self, chunk: str):
+        """Record a streamed chunk and fan it out to every streaming subscriber."""
+        self.chunks.append(chunk)
+        for listener in self.listeners:
+            listener.put_nowait(chunk)
+
+    def close_listeners(self):
+        for listener in self.listeners:
+            listener.put_nowait(None)
+        self.listeners = []
+
+class SingleFlight:
+    """
+    Deduplicates concurrent work by key. The first caller starts the work and later callers with the same key attach
+    to it instead of starting their own, until the work finishes.
+
+    Cancellation is reference-counted: a subscriber that goes away (e.g. a disconnected client) only detaches itself,
+    and the shared work is cancelled once its last subscriber has gone.
+
+    Errors listed in retry_on only concern the caller that started the work (e.g. its quota being used up). A caller
+    that attached to work failing with one of them starts the work again, or attaches to another caller's new attempt,
+    instead of receiving the error.
+    """
+    def __init__(self):
+        self.flights: Dict[str, Flight] = {}
+
+    def _join(self, key: str, work: Callable[[Flight], Awaitable[Any]]) -> Tuple[Flight, bool]:
+        """Attach to the in-flight work for key, or start it. Returns the flight and whether it was already running."""
+        flight = self.flights.get(key)
+        if flight is not None:
+            flight.subscribers += 1
+            return flight, True
+
+        flight = Flight(key)
+        flight.subscribers = 1
+        flight.task = asyncio.create_task(work(flight))
+        flight.task.add_done_callback(lambda _: self._finish(flight))
+        self.flights[key] = flight
+        return flight, False
+
+    def _detach(self, flight: Flight):
+        """Remove the flight so new callers start fresh work instead of attaching to finished or cancelled work."""
+        if self.flights.get(flight.key) is flight:
+            del self.flights[flight.key]
+
+    def _finish(self, flight: Flight):
+        self._detach(flight)
+        flight.close_listeners()
+
+    def _leave(self, flight: Flight):
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.task.done():
+            self._detach(flight)
+            flight.task.cancel()
+
+    async def run(
+        self,
+        key: str,
+        work: Callable[[Flight], Awaitable[Any]],
+        retry_on: Tuple[Type[BaseException], ...] = ()
+    ) -> Tuple[Any, bool]:
+        """Run (or attach to) the work for key and return its result and whether it was coalesced with another caller."""
+        while True:
+            flight, coalesced = self._join(key, work)
+            try:
+                return await asyncio.shield(flight.task), coalesced
+            except retry_on:
+                if not coalesced:
+                    raise
+            finally:
+                self._leave(flight)
+
+    async def stream(
+        self,
+        key: str,
+        work: Callable[[Flight], Awaitable[Any]],
+        retry_on: Tuple[Type[BaseException], ...] = ()
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Like run, but yields ("chunk", chunk) for every chunk the work publishes, starting with the ones published
+        before this subscriber attached, and finally ("result", (result, coalesced)). Work is only retried if it
+        failed before publishing anything.
+        """
+        while True:
+            flight, coalesced = self._join(key, work)
+            queue: asyncio.Queue = asyncio.Queue()
+            for chunk in flight.chunks:
+                queue.put_nowait(chunk)
+            if flight.task.done():
+                queue.put_nowait(None)
+            else:
+                flight.listeners.append(queue)
+
+            try:
+                while (chunk := await queue.get()) is not None:
+                    yield "chunk", chunk
+                try:
+                    result = await asyncio.shield(flight.task)
+                except retry_on:
+                    if not coalesced or flight.chunks:
+                        raise
+                    continue
+                yield "result", (result, coalesced)
+                return
+            finally:
+                if queue in flight.listeners:
+                    flight.listeners.remove(queue)
+                self._leave(flight)
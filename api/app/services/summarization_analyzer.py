@@ -0,0 +1,18 @@
+from app.models.analysis import ApplicationType
+from app.models.summarization import SummarizationResult
+from app.services.text_analyzer import TextAnalyzer
+
+
+class SummarizationAnalyzer(TextAnalyzer):
+    """ Text Analysis Service producing a concise summary and the key points of a text. """
+    application = ApplicationType.SUMMARIZATION
+    result_model = SummarizationResult
+
+    def _generate_fallback_response(self) -> SummarizationResult:
+        """ Generate a fallback response in case of analysis failure. """
+        return SummarizationResult(
+            summary="Analysis failed - consider possible model or prompt issues.",
+            key_points=[]
+        )
+
+summarization_analyzer = SummarizationAnalyzer()
@@ -0,0 +1,479 @@
+import time
+import re
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+import numpy as np
+import orjson
+from pydantic import BaseModel, ValidationError
+
+from app.models.analysis import AnalysisResponse, AnalysisStatistics, ApplicationType, RepairOutcome
+from app.models.llm_models import ModelGenerationParams
+from app.services.prompt_manager import prompt_manager
+from app.services.ollama_manager import ollama_manager
+from app.services.metrics_calback_handler import MetricsCallbackHandler
+from app.services.token_estimator import token_estimator
+from app.services.json_stream_watcher import JsonObjectWatcher
+from app.services.embedding_service import embedding_service
+from app.services.semantic_cache import semantic_cache
+from app.services.single_flight import SingleFlight
+from app.services.generation_scheduler import generation_scheduler
+from app.services.work_tracker import work_tracker
+from app.services.client_manager import client_manager, current_client, QuotaExceeded
+from app.services.json_repair import REPAIR_PROMPT, repair_candidates, clamp_out_of_range, format_errors
+from app.core.config import settings
+
+
+@dataclass
+class PreparedText:
+    """Preprocessing of an input text that is done once and shared by every application run over it."""
+    text: str
+    text_hash: str
+    model_name: str
+    text_tokens: int
+    embedding: Optional[np.ndarray] = None
+
+async def prepare_text(text: str, model_name: str) -> PreparedText:
+    """Hash the text, estimate its token count and, when the semantic cache is enabled, embed it."""
+    embedding = None
+    if settings.semantic_cache_enabled:
+        try:
+            embedding = await embedding_service.embed_text(text)
+        except Exception as e:
+            print(f"Error embedding text for the semantic cache: {e}")
+    return PreparedText(
+        text=text,
+        text_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        model_name=model_name,
+        text_tokens=token_estimator.estimate_tokens(model_name, text),
+        embedding=embedding
+    )
+
+
+class TextAnalyzer(ABC):
+    """
+    Base text analysis service. Runs a prompt for one application over a text with an Ollama model and parses the
+    output into the application's result model.
+
+    Subclasses set application and result_model (as class attributes) and provide a fallback result, and can hook
+    into successful results.
+    """
+    # Whitespace-only chunks streamed after a complete result before the generation is stopped. Models often pad JSON
+    # output with newlines until they hit num_predict, while one that is done only sends a few before it stops.
+    MAX_TRAILING_WHITESPACE_CHUNKS = 4
+
+    def __init__(self):
+        self.in_flight = SingleFlight()
+
+    @property
+    @abstractmethod
+    def application(self) -> ApplicationType:
+        """Application the analyzer runs."""
+
+    @property
+    @abstractmethod
+    def result_model(self) -> Type[BaseModel]:
+        """Model the output is parsed into."""
+
+    @abstractmethod
+    def _generate_fallback_response(self) -> BaseModel:
+        """ Generate a fallback response in case of analysis failure. """
+
+    async def _on_result(self, prepared: PreparedText, prompt_name: str, result: BaseModel):
+        """Called with every successfully parsed result from a new generation."""
+        pass
+
+    def _normalize_result_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Recompute the fields of a repaired result that can be derived from the rest of it (e.g. counts)."""
+        return data
+
+    def _extract_analysis_from_response(self, response: str) -> Optional[BaseModel]:
+        """
+        Extract and parse JSON from LLM response. Flexible implementation to handle various
+        formats since not all prompt + model combinations will return strrictly structured output
+        """
+        cleaned_response = response.strip()
+        try:
+            # Attempt to parse the response directly
+            try:
+                return self.result_model.model_validate_json(cleaned_response)
+            except ValidationError:
+                print("Direct JSON parsing failed, attempting to extract JSON from response")
+
+            # Attempt to find JSON by looking for balanced braces
+            try:
+                start_idx = cleaned_response.find('{')
+                if start_idx == -1: # no point in continuing if no opening brace
+                    print("No opening brace found in response")
+                    return None
+
+                # print(f"Found opening brace at index {start_idx}")
+                brace_count = 0
+                end_idx = -1
+                for i,char in enumerate(cleaned_response[start_idx:], start_idx):
+                    if char == '{':
+                        brace_count += 1
+                    elif char == '}':
+                        brace_count -= 1
+                        if brace_count == 0:
+                            end_idx = i
+                            break
+
+                if end_idx != -1:
+                    # print(f"Found closing brace at index {end_idx}")
+                    # print(f"Extracted JSON: {cleaned_response[start_idx:end_idx + 1]}")
+                    return self.result_model.model_validate_json(cleaned_response[start_idx:end_idx + 1])
+            except ValidationError as e:
+                print(f"Failed to extract JSON from response through brace matching. Attempting regex extraction: {e}")
+
+            # Use regex to find json-like structures
+            # Pattern to match JSON object starting with { and ending with }
+            json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
+            matches = re.findall(json_pattern, cleaned_response, re.DOTALL)
+
+            # Try parsing each match, starting with the longest (most complete)
+            matches.sort(key=len, reverse=True)
+            for match in matches:
+                try:
+                    return self.result_model.model_validate_json(match)
+                except ValidationError:
+                    continue
+        except Exception as e:
+            print(f"Analysis extraction failed: {e}")
+
+        return None
+
+    def _repair_locally(self, response: str) -> Tuple[Optional[BaseModel], List[str]]:
+        """
+        Deterministically repair a malformed response: fix its JSON syntax, recompute derived fields and clamp
+        out-of-range values. Returns the result, or None and the remaining errors of the most complete candidate.
+        """
+        errors = []
+        for data in repair_candidates(response):
+            data = self._normalize_result_data(data)
+            while True:
+                try:
+                    return self.result_model.model_validate(data), []
+                except ValidationError as e:
+                    if not clamp_out_of_range(data, e):
+                        errors = errors or format_errors(e)
+                        break
+        return None, errors or ["Output does not contain a JSON object"]
+
+    async def _repair_with_model(
+        self,
+        response: str,
+        errors: List[str],
+        model_name: str,
+        generation_params: ModelGenerationParams
+    ) -> Tuple[Optional[BaseModel], MetricsCallbackHandler]:
+        """
+        Ask the model to fix its own output. The repair prompt only holds the partial output, the validation errors and
+        the result schema, not the input text, so it is far cheaper than running the analysis again.
+        """
+        prompt = REPAIR_PROMPT.format(
+            errors="\n".join(f"- {error}" for error in errors),
+            schema=orjson.dumps(self.result_model.model_json_schema()).decode(),
+            partial=response[response.find('{'):].strip()
+        )
+        if settings.adaptive_context:
+            num_ctx = token_estimator.select_context_bucket(token_estimator.estimate_tokens(model_name, prompt), generation_params.max_tokens, generation_params.context_length)
+        else:
+            num_ctx = None
+        llm = ollama_manager.get_model_instance(model_name, num_ctx=num_ctx, generation_params=generation_params)
+
+        metrics_callback = MetricsCallbackHandler()
+        prompt_tokens = token_estimator.estimate_tokens(model_name, prompt)
+        client = current_client.get()
+        with client_manager.metered(prompt_tokens, generation_params.max_tokens, metrics_callback):
+            async with generation_scheduler.slot(client.client_id, client.weight, prompt_tokens + (generation_params.max_tokens or 0)):
+                with work_tracker.wasted_on_cancel(prompt_tokens, metrics_callback):
+                    output = await llm.ainvoke(prompt, config={"callbacks": [metrics_callback]})
+        result = self._extract_analysis_from_response(output)
+        if not result:
+            result, _ = self._repair_locally(output)
+        return result, metrics_callback
+
+    async def _repair(self, response: str, model_name: str, generation_params: ModelGenerationParams) -> Tuple[Optional[BaseModel], Dict[str, Any]]:
+        """Repair a response that didn't parse into a valid result, locally first and then with the model. Returns the result and repair statistics."""
+        start = time.perf_counter_ns()
+        stats = {'repair_outcome': RepairOutcome.FAILED}
+        result, errors = self._repair_locally(response)
+        if result:
+            stats['repair_outcome'] = RepairOutcome.LOCAL
+        elif settings.repair_with_model and '{' in response:
+            try:
+                result, repair_callback = await self._repair_with_model(response, errors, model_name, generation_params)
+                stats.update({
+                    'repair_prompt_tokens': repair_callback.metrics.get('prompt_eval_count'),
+                    'repair_eval_tokens': repair_callback.metrics.get('eval_count', repair_callback.token_count)
+                })
+                if result:
+                    stats['repair_outcome'] = RepairOutcome.MODEL
+            except Exception as e:
+                print(f"Error repairing response with the model: {e}")
+        stats['repair_duration'] = time.perf_counter_ns() - start
+        return result, stats
+
+    def _cache_namespace(self, model_name: str, prompt_name: str, generation_params: ModelGenerationParams) -> str:
+        """
+        Semantic cache namespace: results are only reused for the same application, model, prompt version and
+        generation parameters. Options that only affect performance (context window, which is sized per request, GPU
+        offload, threads and keep-alive) are excluded, so tuning them doesn't invalidate results.
+        """
+        prompt = prompt_manager.get_prompt(prompt_name)
+        params = generation_params.model_dump_json(exclude={'ollama_model_name', 'context_length', 'gpu_count', 'thread_count', 'keep_alive'})
+        params_hash = hashlib.sha256(params.encode("utf-8")).hexdigest()[:16]
+        return f"{self.application.value}|{model_name}|{prompt_name}@{prompt.version}|{params_hash}"
+
+    def analysis_key(self, model_name: str, prompt_name: str, generation_params: Optional[ModelGenerationParams] = None) -> str:
+        """
+        Identity of an analysis configuration: application, model, prompt version and effective generation parameters.
+        Results are interchangeable between analyses of the same text with the same key.
+        """
+        return self._cache_namespace(model_name, prompt_name, ollama_manager.resolve_generation_params(model_name, generation_params))
+
+    def parse_response(self, response: str) -> Optional[BaseModel]:
+        """Parse a model response into the application's result, without repairing it. None if it doesn't parse."""
+        return self._extract_analysis_from_response(response)
+
+    def _request_key(self, prepared: PreparedText, prompt_name: str, generation_params: ModelGenerationParams) -> str:
+        """Identity of an analysis for coalescing: same text, prompt version, model and effective generation parameters."""
+        prompt = prompt_manager.get_prompt(prompt_name)
+        digest = hashlib.sha256()
+        for part in (prepared.text_hash, prepared.model_name, prompt_name, prompt.version, generation_params.model_dump_json(exclude={'ollama_model_name'})):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    async def _generate(
+        self,
+        chain,
+        text: str,
+        metrics_callback: MetricsCallbackHandler,
+        on_chunk: Optional[Callable[[str], None]] = None
+    ) -> Tuple[str, Optional[BaseModel]]:
+        """
+        Stream the generation and, when early stopping is enabled, stop it if the model keeps writing after the output
+        contains a complete and valid result. Models often keep chatting after the JSON object closes. Closing the
+        stream drops the connection to Ollama, which aborts the generation so those tokens are never produced. The
+        same goes for a model padding the result with whitespace, once it has sent MAX_TRAILING_WHITESPACE_CHUNKS
+        whitespace-only chunks. A model that stops on its own after the result is left to finish, so Ollama's final
+        statistics are kept.
+
+        Every chunk is passed to on_chunk as it arrives. Returns the raw output and the result if one was found while streaming.
+        """
+        chunks = []
+        watcher = JsonObjectWatcher()
+        parsed_result = None
+        trailing_whitespace_chunks = 0
+        async with aclosing(chain.astream({"text": text}, config={"callbacks": [metrics_callback]})) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+                if parsed_result is not None:
+                    # Anything but whitespace after the result means the model is still talking, and a run of
+                    # whitespace means it is padding the output
+                    trailing_whitespace_chunks += 1
+                    if chunk.strip() or trailing_whitespace_chunks >= self.MAX_TRAILING_WHITESPACE_CHUNKS:
+                        return "".join(chunks), parsed_result
+                    continue
+                if not settings.early_stop_on_complete_json:
+                    continue
+                for candidate in watcher.feed(chunk):
+                    try:
+                        parsed_result = self.result_model.model_validate_json(candidate)
+                        break
+                    except ValidationError:
+                        continue
+                # The chunk that closed the result may already carry the start of the chatter
+                if parsed_result is not None and chunk[chunk.rfind('}') + 1:].strip():
+                    return "".join(chunks), parsed_result
+        return "".join(chunks), parsed_result
+
+    async def _prepare(self, model_name: str, prompt_name: Optional[str], generation_params: Optional[ModelGenerationParams]):
+        """Validate the model and prompt, and resolve the prompt name and the effective generation parameters."""
+        if not await ollama_manager.is_model_available(model_name):
+            raise ValueError(f"Model '{model_name}' is not available")
+
+        prompt_name = prompt_name or prompt_manager.get_default_prompt_name(self.application)
+        prompt = prompt_manager.get_prompt(prompt_name) if prompt_name else None
+        if not prompt:
+            raise ValueError(f"Prompt '{prompt_name}' not found")
+        if prompt.application != self.application:
+            raise ValueError(f"Prompt '{prompt_name}' is for {prompt.application.value}, not {self.application.value}")
+
+        prompt_template = prompt_manager.create_langchain_prompt(prompt_name)
+        return prompt_name, prompt_template, ollama_manager.resolve_generation_params(model_name, generation_params)
+
+    async def _run_analysis(
+        self,
+        prepared: PreparedText,
+        prompt_name: str,
+        prompt_template,
+        effective_params: ModelGenerationParams,
+        on_chunk: Optional[Callable[[str], None]] = None
+    ) -> AnalysisResponse:
+        """Run a single analysis end to end: semantic cache lookup, generation, result extraction and result hooks."""
+        text, model_name = prepared.text, prepared.model_name
+        try:
+            # Size the context window from a pre-flight estimate so short inputs don't reserve a large KV cache
+            # and long inputs aren't truncated by a small one. The text's own estimate is shared across applications.
+            prompt_text = prompt_template.format(text=text)
+            estimated_prompt_tokens = prepared.text_tokens + token_estimator.estimate_tokens(model_name, prompt_template.format(text=""))
+
+            # Near-duplicate texts reuse a previous result when the semantic cache is enabled
+            if prepared.embedding is not None:
+                cache_namespace = self._cache_namespace(model_name, prompt_name, effective_params)
+                try:
+                    cached = semantic_cache.lookup(cache_namespace, prepared.embedding, self.result_model)
+                except Exception as e:
+                    print(f"Semantic cache lookup failed: {e}")
+                    cached = None
+                if cached:
+                    cached_result, similarity = cached
+                    return AnalysisResponse(
+                        model_used=model_name,
+                        success=True,
+                        application=self.application,
+                        timestamp=time.time(),
+                        result=cached_result,
+                        cached=True,
+                        cache_similarity=similarity
+                    )
+
+            if settings.adaptive_context:
+                response_tokens = token_estimator.expected_response_tokens(model_name, prompt_name, effective_params.max_tokens)
+                num_ctx = token_estimator.select_context_bucket(estimated_prompt_tokens, response_tokens, effective_params.context_length)
+            else:
+                num_ctx = None
+            llm = ollama_manager.get_model_instance(model_name, num_ctx=num_ctx, generation_params=effective_params)
+
+            # Create LCEL chain
+            chain = prompt_template | llm
+
+            metrics_callback = MetricsCallbackHandler()
+
+            # Generations reserve their cost against the quota of the client that started them before they are queued,
+            # are queued fairly across clients, and are charged for what they actually used
+            client = current_client.get()
+            with client_manager.metered(estimated_prompt_tokens, effective_params.max_tokens, metrics_callback):
+                async with generation_scheduler.slot(client.client_id, client.weight, estimated_prompt_tokens + (effective_params.max_tokens or 0)):
+                    with work_tracker.wasted_on_cancel(estimated_prompt_tokens, metrics_callback):
+                        result, parsed_result = await self._generate(chain, text, metrics_callback, on_chunk)
+
+            early_stopped = not metrics_callback.completed
+            if early_stopped:
+                actual_prompt_tokens = None
+                metrics_callback.record_stopped_generation(estimated_prompt_tokens)
+            else:
+                actual_prompt_tokens = metrics_callback.metrics.get('prompt_eval_count')
+                token_estimator.calibrate(model_name, prompt_text, actual_prompt_tokens)
+            # A generation that was cut off needed the tokens it streamed, the rest was never produced
+            token_estimator.record_response(model_name, prompt_name, metrics_callback.metrics.get('eval_count'))
+            metrics_callback.metrics.update({
+                'estimated_prompt_tokens': estimated_prompt_tokens,
+                'token_estimate_error': (estimated_prompt_tokens - actual_prompt_tokens) / actual_prompt_tokens if actual_prompt_tokens else None,
+                'context_bucket': llm.num_ctx,
+                'early_stopped': early_stopped,
+                'unused_budget': max(llm.num_predict - metrics_callback.token_count, 0) if early_stopped and llm.num_predict else 0
+            })
+
+            if not parsed_result:
+                parsed_result = self._extract_analysis_from_response(result)
+            if not parsed_result and settings.repair_malformed_output:
+                parsed_result, repair_stats = await self._repair(result, model_name, effective_params)
+                metrics_callback.metrics.update(repair_stats)
+            success = parsed_result is not None
+
+            if not parsed_result:
+                print("Warning: Could not extract valid JSON from LLM response.")
+                print(f"Raw response: {result[:500]}...")  # Log first 500 chars for debugging
+                parsed_result = self._generate_fallback_response()
+            else:
+                if prepared.embedding is not None:
+                    try:
+                        semantic_cache.insert(cache_namespace, prepared.embedding, parsed_result)
+                    except Exception as e:
+                        print(f"Semantic cache insert failed: {e}")
+                await self._on_result(prepared, prompt_name, parsed_result)
+
+            return AnalysisResponse(
+                model_used=model_name,
+                success=success,
+                application=self.application,
+                timestamp=time.time(),
+                result=parsed_result,
+                raw_model_response=result,
+                statistics=AnalysisStatistics(**metrics_callback.metrics)
+            )
+        except ValidationError as e:
+            print(f"Callback metrics: {metrics_callback.metrics}")
+            print(f"Error validating statistics: {e}")
+            raise
+        except Exception as e:
+            print(f"Error analyzing text: {e}")
+            raise
+
+    async def analyze_prepared(
+        self,
+        prepared: PreparedText,
+        prompt_name: Optional[str] = None,
+        generation_params: Optional[ModelGenerationParams] = None
+    ) -> AnalysisResponse:
+        """
+        Analyze a text that has already been through prepare_text.
+        Concurrent identical requests share a single generation, and their responses are marked as coalesced. The
+        generation is charged to the client whose request started it, so when that client is over quota, the requests
+        coalesced onto it run the analysis again under their own quota instead of sharing its rejection.
+        """
+        prompt_name, prompt_template, effective_params = await self._prepare(prepared.model_name, prompt_name, generation_params)
+        key = self._request_key(prepared, prompt_name, effective_params)
+        response, coalesced = await self.in_flight.run(
+            key,
+            lambda flight: self._run_analysis(prepared, prompt_name, prompt_template, effective_params, flight.publish),
+            retry_on=(QuotaExceeded,)
+        )
+        return response.model_copy(update={'coalesced': True}) if coalesced else response
+
+    async def analyze_text(
+        self,
+        text: str,
+        model_name: str,
+        prompt_name: Optional[str] = None,
+        generation_params: Optional[ModelGenerationParams] = None
+    ) -> AnalysisResponse:
+        """
+        Analyse text using the specified Ollama model.
+        generation_params overrides the model's saved configuration for this request only.
+        """
+        return await self.analyze_prepared(await prepare_text(text, model_name), prompt_name, generation_params)
+
+    async def analyze_text_stream(
+        self,
+        text: str,
+        model_name: str,
+        prompt_name: Optional[str] = None,
+        generation_params: Optional[ModelGenerationParams] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of analyze_text. Yields ("token", chunk) as the model generates and finally
+        ("result", AnalysisResponse). Requests coalesced onto an in-flight generation receive the same token stream,
+        including the tokens generated before they attached.
+        """
+        prompt_name, prompt_template, effective_params = await self._prepare(model_name, prompt_name, generation_params)
+        prepared = await prepare_text(text, model_name)
+        key = self._request_key(prepared, prompt_name, effective_params)
+        async for event, data in self.in_flight.stream(
+            key,
+            lambda flight: self._run_analysis(prepared, prompt_name, prompt_template, effective_params, flight.publish),
+            retry_on=(QuotaExceeded,)
+        ):
+            if event == "chunk":
+                yield "token", data
+            else:
+                response, coalesced = data
+                yield "result", response.model_copy(update={'coalesced': True}) if coalesced else response
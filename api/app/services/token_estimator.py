@@ -0,0 +1,84 @@
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+class TokenEstimator:
+    """
+    Pre-flight token estimates for prompts, used to size the context window before a request reaches Ollama.
+
+    Ollama does not expose the model tokenizer, so the estimate is a characters-per-token heuristic. The ratio is
+    calibrated per model from the prompt_eval_count Ollama reports after each generation.
+
+    The context window also has to hold the response. Reserving the whole max_tokens budget would put every request
+    in a bucket larger than it needs, so once enough responses of a model and prompt have been observed, the window
+    reserves a high percentile of their length (plus margin) instead, capped at max_tokens.
+    """
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+    # Anything outside this range is almost certainly a cached prompt or a bad report, so it is not used for calibration
+    MIN_CHARS_PER_TOKEN = 1.0
+    MAX_CHARS_PER_TOKEN = 12.0
+    RESPONSE_PERCENTILE = 0.95
+    RESPONSE_SAMPLES = 200 # Most recent response lengths kept per model and prompt
+    MIN_RESPONSE_SAMPLES = 10 # Responses observed before the reservation is based on them instead of max_tokens
+
+    def __init__(self, context_buckets: List[int], margin: float = 0.1, smoothing: float = 0.2):
+        self.context_buckets = sorted(context_buckets)
+        self.margin = margin
+        self.smoothing = smoothing
+        self.chars_per_token: Dict[str, float] = {}
+        self.response_tokens: Dict[Tuple[str, str], Deque[int]] = {}
+
+    def estimate_tokens(self, model_name: str, text: str) -> int:
+        """Estimate the number of tokens the model will see for the given text."""
+        ratio = self.chars_per_token.get(model_name, self.DEFAULT_CHARS_PER_TOKEN)
+        return math.ceil(len(text) / ratio)
+
+    def calibrate(self, model_name: str, text: str, actual_tokens: int):
+        """Fold an observed (characters, tokens) pair into the model's ratio using an exponential moving average."""
+        if not actual_tokens or actual_tokens <= 0:
+            return
+        observed = len(text) / actual_tokens
+        if not self.MIN_CHARS_PER_TOKEN <= observed <= self.MAX_CHARS_PER_TOKEN:
+            return
+        if model_name not in self.chars_per_token:
+            self.chars_per_token[model_name] = observed
+        else:
+            current = self.chars_per_token[model_name]
+            self.chars_per_token[model_name] = current + self.smoothing * (observed - current)
+
+    def record_response(self, model_name: str, prompt_name: str, eval_tokens: Optional[int]):
+        """Record the number of tokens a generation with the model and prompt produced."""
+        if not eval_tokens or eval_tokens <= 0:
+            return
+        self.response_tokens.setdefault((model_name, prompt_name), deque(maxlen=self.RESPONSE_SAMPLES)).append(eval_tokens)
+
+    def expected_response_tokens(self, model_name: str, prompt_name: str, max_tokens: Optional[int]) -> Optional[int]:
+        """
+        Tokens to reserve in the context window for the response: the RESPONSE_PERCENTILE of the observed response
+        lengths plus margin, capped at max_tokens. max_tokens until MIN_RESPONSE_SAMPLES responses have been observed.
+        """
+        samples = self.response_tokens.get((model_name, prompt_name))
+        if not samples or len(samples) < self.MIN_RESPONSE_SAMPLES:
+            return max_tokens
+        ordered = sorted(samples)
+        expected = math.ceil(ordered[math.ceil(self.RESPONSE_PERCENTILE * len(ordered)) - 1] * (1 + self.margin))
+        return min(expected, max_tokens) if max_tokens else expected
+
+    def select_context_bucket(self, estimated_prompt_tokens: int, response_tokens: int, max_context: Optional[int] = None) -> int:
+        """
+        Pick the smallest context bucket that fits the prompt estimate (plus margin) and the response tokens, usually
+        expected_response_tokens.
+
+        max_context is the model's configured context_length. Requests larger than every bucket get it when it is
+        larger than the largest bucket, so a model configured for long inputs still gets its full window. Otherwise
+        they get the largest bucket, and Ollama will truncate the prompt.
+        """
+        required = math.ceil(estimated_prompt_tokens * (1 + self.margin)) + (response_tokens or 0)
+        for bucket in self.context_buckets:
+            if bucket >= required:
+                return bucket
+        return max(self.context_buckets[-1], max_context or 0)
+
+token_estimator = TokenEstimator(settings.context_buckets, margin=settings.context_estimate_margin)
@@ -0,0 +1,107 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from app.models.work import WorkStats
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its analysis finished."""
+    pass
+
+class WorkTracker:
+    """
+    Tracks the analysis requests in flight and how each one ended, and the tokens spent on generations that were
+    aborted before producing a result (client disconnects and shutdown cancellations).
+
+    On shutdown the server stops admitting new analyses, and the requests in flight at that point are either
+    completed or cancelled at the shutdown deadline. drain_report summarizes what happened to them.
+    """
+    def __init__(self):
+        self.accepting = True
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.cancelled = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_eval_tokens = 0
+        self.drain_started: Optional[float] = None
+        self.drain_baseline: Optional[WorkStats] = None
+
+    @asynccontextmanager
+    async def track(self):
+        """Count an analysis request for the duration of the block, and record how it ended."""
+        self.active += 1
+        try:
+            yield
+        except ClientDisconnected:
+            self.disconnected += 1
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            # Streams are cancelled when their client disconnects, and every request is cancelled at the shutdown deadline
+            if self.accepting:
+                self.disconnected += 1
+            else:
+                self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.active -= 1
+
+    @contextmanager
+    def wasted_on_cancel(self, prompt_tokens: int, metrics_callback):
+        """Count the prompt and the tokens generated so far as wasted if the generation in the block is cancelled."""
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.wasted_prompt_tokens += prompt_tokens
+            self.wasted_eval_tokens += metrics_callback.token_count
+            raise
+
+    def stop_admitting(self):
+        """Stop admitting new analyses. Called once when the server starts shutting down."""
+        if not self.accepting:
+            return
+        self.drain_baseline = self.get_stats()
+        self.drain_started = time.perf_counter()
+        self.accepting = False
+        print(f"Shutting down: no longer admitting analyses, draining {self.active} in flight")
+
+    async def wait_idle(self, timeout: float):
+        """Wait up to timeout seconds for the analyses in flight to finish, e.g. to let cancelled ones unwind."""
+        deadline = time.perf_counter() + timeout
+        while self.active and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+    def drain_report(self) -> str:
+        """Summary of what happened to the analyses in flight since the server stopped admitting work."""
+        if self.drain_baseline is None:
+            return "No drain in progress"
+        stats, baseline = self.get_stats(), self.drain_baseline
+        return (
+            f"Drained {baseline.active} analyses in {time.perf_counter() - self.drain_started:.1f}s: "
+            f"{stats.completed - baseline.completed} completed, {stats.failed - baseline.failed} failed, "
+            f"{stats.disconnected - baseline.disconnected} disconnected, {stats.cancelled - baseline.cancelled} cancelled, "
+            f"{stats.active} still active. Wasted {stats.wasted_prompt_tokens - baseline.wasted_prompt_tokens} prompt and "
+            f"{stats.wasted_eval_tokens - baseline.wasted_eval_tokens} generated tokens"
+        )
+
+    def get_stats(self) -> WorkStats:
+        return WorkStats(
+            accepting=self.accepting,
+            active=self.active,
+            completed=self.completed,
+            failed=self.failed,
+            disconnected=self.disconnected,
+            cancelled=self.cancelled,
+            wasted_prompt_tokens=self.wasted_prompt_tokens,
+            wasted_eval_tokens=self.wasted_eval_tokens
+        )
+
+work_tracker = WorkTracker()
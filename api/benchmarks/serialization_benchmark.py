@@ -0,0 +1,159 @@
+"""
+Serialization benchmark for the analysis hot path.
+
+Compares FastAPI's default response handling (response_model re-validation, jsonable_encoder and json.dumps) and the
+json.load/json.dump(indent=2) storage format against the fast path in app.core.serialization, using large
+multi-argument results. Each fast path is checked to decode to exactly the same document as its baseline.
+
+Run from the api/ directory:
+    python -m benchmarks.serialization_benchmark [--arguments 500] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import timeit
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.serialization import FastJSONResponse, load_model_from_file, save_model_to_file
+from app.models.analysis import AnalysisResponse, AnalysisStatistics
+from app.models.argument_analysis import Argument, ArgumentAnalysisResult, LogicalFrameworkStep
+from app.models.prompts import Prompt
+
+
+def build_result(argument_count: int) -> ArgumentAnalysisResult:
+    """Build a result with many arguments, each carrying a realistic amount of nested content."""
+    arguments = [
+        Argument(
+            argument=f"Argument {i}: investment in renewable energy reduces long-term costs for consumers ✓",
+            supporting_claims=[f"Supporting claim {i}.{j} citing a study of grid prices" for j in range(5)],
+            qualifiers=[f"Qualifier {i}.{j} about regional variation" for j in range(3)],
+            logical_framework=[
+                LogicalFrameworkStep(step_number=str(j + 1), statement=f"Premise {j + 1} of argument {i}")
+                for j in range(3)
+            ] + [LogicalFrameworkStep(step_number="∴", statement=f"Therefore, conclusion of argument {i}")],
+            model_assessment="The argument is well structured but relies on a single data source. " * 3,
+            confidence_score=round((i % 100) / 100, 2),
+        )
+        for i in range(argument_count)
+    ]
+    return ArgumentAnalysisResult(
+        arguments=arguments,
+        overall_assessment="Overall the text presents a coherent but under-evidenced case. " * 5,
+        credibility_score=0.72,
+        argument_count=argument_count,
+        well_supported_arguments=argument_count // 2,
+    )
+
+
+def build_response(result: ArgumentAnalysisResult) -> AnalysisResponse:
+    statistics = AnalysisStatistics(
+        created_at=datetime.now(),
+        total_duration=12_345_678_901,
+        load_duration=12_345,
+        load_time_ratio=0.00001,
+        time_to_first_token=0.8123,
+        prompt_eval_count=1234,
+        prompt_eval_duration=1_234_567_890,
+        prompt_tokens_per_second=999.5,
+        prompt_time_ratio=0.1,
+        eval_count=4321,
+        eval_duration=9_876_543_210,
+        tokens_per_second=43.75,
+        generation_time_ratio=0.8,
+        total_throughput_tokens_per_sec=450.25,
+        context_length=8192,
+        context_window_prompt_fill_rate=0.15,
+        context_window_response_fill_rate=0.52,
+        overhead_time=1_000_000,
+    )
+    return AnalysisResponse(
+        model_used="phi4:14b",
+        success=True,
+        result=result,
+        raw_model_response=result.model_dump_json(),
+        statistics=statistics,
+    )
+
+
+def build_prompt() -> Prompt:
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, "..", "prompts", "example", "argument_analysis.json"), "r", encoding="utf-8") as file:
+        return Prompt(**json.load(file))
+
+
+def default_encode(loop, field, response: AnalysisResponse) -> bytes:
+    """FastAPI's default path for a route declared with response_model=AnalysisResponse."""
+    content = loop.run_until_complete(serialize_response(field=field, response_content=response))
+    return JSONResponse(content).body
+
+
+def fast_encode(response: AnalysisResponse) -> bytes:
+    return FastJSONResponse(response).body
+
+
+def time_call(func, repeat: int) -> float:
+    """Best-of-N time per call in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def report(label: str, baseline_ms: float, fast_ms: float):
+    speedup = baseline_ms / fast_ms if fast_ms > 0 else float("inf")
+    print(f"{label:<34}{baseline_ms:>12.3f}{fast_ms:>12.3f}{speedup:>10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arguments", type=int, default=500, help="Number of arguments in the benchmark result")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed repetitions (best is reported)")
+    args = parser.parse_args()
+
+    response = build_response(build_result(args.arguments))
+    field = create_model_field(name="Response_analyze_text", type_=AnalysisResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    baseline_body = default_encode(loop, field, response)
+    fast_body = fast_encode(response)
+    assert json.loads(baseline_body) == json.loads(fast_body), "Fast response encoding differs from FastAPI default"
+
+    raw_result = response.result.model_dump_json()
+    baseline_result = ArgumentAnalysisResult(**json.loads(raw_result))
+    assert ArgumentAnalysisResult.model_validate_json(raw_result) == baseline_result, "Fast decoding differs"
+
+    prompt = build_prompt()
+    config_dir = tempfile.mkdtemp()
+    baseline_path = os.path.join(config_dir, "baseline.json")
+    fast_path = os.path.join(config_dir, "fast.json")
+
+    def baseline_save():
+        with open(baseline_path, "w", encoding="utf-8") as file:
+            json.dump(prompt.model_dump(mode='json'), file, ensure_ascii=False, indent=2)
+
+    def baseline_load():
+        with open(baseline_path, "r", encoding="utf-8") as file:
+            return Prompt(**json.load(file))
+
+    baseline_save()
+    save_model_to_file(fast_path, prompt)
+    assert load_model_from_file(fast_path, Prompt) == baseline_load(), "Compact prompt storage differs"
+
+    print(f"Response with {args.arguments} arguments: {len(baseline_body):,} bytes\n")
+    print(f"{'operation':<34}{'default ms':>12}{'fast ms':>12}{'speedup':>11}")
+    report("encode AnalysisResponse", time_call(lambda: default_encode(loop, field, response), args.repeat),
+           time_call(lambda: fast_encode(response), args.repeat))
+    report("decode ArgumentAnalysisResult", time_call(lambda: ArgumentAnalysisResult(**json.loads(raw_result)), args.repeat),
+           time_call(lambda: ArgumentAnalysisResult.model_validate_json(raw_result), args.repeat))
+    report("save prompt", time_call(baseline_save, args.repeat),
+           time_call(lambda: save_model_to_file(fast_path, prompt), args.repeat))
+    report("load prompt", time_call(baseline_load, args.repeat),
+           time_call(lambda: load_model_from_file(fast_path, Prompt), args.repeat))
+    print(f"\nPrompt on disk: {os.path.getsize(baseline_path):,} bytes (indent=2) vs {os.path.getsize(fast_path):,} bytes (compact)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,33 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import ORJSONResponse
 
+from app.core import server
 from app.core.config import settings
-from app.api.v1 import analysis, prompts, health, models
+from app.api.v1 import analysis, prompts, health, models, arguments, usage, documents
+from app.api.dependencies import get_client
+from app.services.work_tracker import work_tracker
+from app.services.autotuner import autotuner
+from app.services.argument_index import argument_index
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # By now the server has waited for in-flight analyses up to the shutdown deadline and cancelled the rest
+    work_tracker.stop_admitting()
+    await autotuner.cancel_all()
+    await work_tracker.wait_idle(timeout=5.0)
+    await argument_index.drain()
+    print(work_tracker.drain_report())
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description=settings.app_description,
     debug=settings.debug,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -22,9 +40,14 @@ app.add_middleware(
 )
 
 app.include_router(health.health_check_router, prefix=settings.api_prefix, tags=["Health Check"])
-app.include_router(analysis.analysis_router, prefix=settings.api_prefix, tags=["Text Analysis"])
-app.include_router(prompts.prompts_router, prefix=settings.api_prefix, tags=["Prompt Management"])
-app.include_router(models.llm_models_router, prefix=settings.api_prefix, tags=["Model Management"])
+# Every router but the health check requires an API key once clients are configured
+authenticated = [Depends(get_client)]
+app.include_router(analysis.analysis_router, prefix=settings.api_prefix, tags=["Text Analysis"], dependencies=authenticated)
+app.include_router(prompts.prompts_router, prefix=settings.api_prefix, tags=["Prompt Management"], dependencies=authenticated)
+app.include_router(models.llm_models_router, prefix=settings.api_prefix, tags=["Model Management"], dependencies=authenticated)
+app.include_router(arguments.arguments_router, prefix=settings.api_prefix, tags=["Argument Search"], dependencies=authenticated)
+app.include_router(documents.documents_router, prefix=settings.api_prefix, tags=["Document Sessions"], dependencies=authenticated)
+app.include_router(usage.usage_router, prefix=settings.api_prefix, tags=["Usage"], dependencies=authenticated)
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -38,7 +61,7 @@ async def root():
     }
 
 def main():
-    uvicorn.run(app, host=settings.host, port=settings.port, reload=settings.debug)
+    server.run("main:app", host=settings.host, port=settings.port, reload=settings.debug)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
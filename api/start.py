@@ -3,7 +3,7 @@
 Startup script for the TAP API.
 """
 
-import uvicorn
+from app.core import server
 from app.core.config import settings
 
 def main():
@@ -15,7 +15,7 @@ def main():
     print(f"API will be available at: http://localhost:8000{settings.api_prefix}")
     print("API documentation will be available at: http://localhost:8000/docs")
 
-    uvicorn.run(
+    server.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Services create their data directories in the working directory when they are imported, keep them out of the tree
+os.chdir(tempfile.mkdtemp(prefix="tap-tests-"))
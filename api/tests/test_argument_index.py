@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.argument_analysis import Argument, ArgumentAnalysisResult
+from app.models.argument_index import ArgumentSearchRequest
+from app.services.argument_index import ArgumentIndex, build_ivf
+
+DIMENSION = 32
+
+def clustered_vectors(rows: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSION))
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.05 * rng.standard_normal((rows, DIMENSION))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def analysis(arguments: int) -> ArgumentAnalysisResult:
+    return ArgumentAnalysisResult(
+        arguments=[
+            Argument(argument=f"argument {i}", model_assessment="ok", confidence_score=0.5)
+            for i in range(arguments)
+        ],
+        overall_assessment="ok",
+        credibility_score=0.5,
+        argument_count=arguments,
+        well_supported_arguments=0
+    )
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "argument_index_ivf_probes", 4)
+    return ArgumentIndex(str(tmp_path))
+
+def test_ivf_lists_hold_every_row_once():
+    ivf = build_ivf(clustered_vectors(2000, 10), lists=20, sample_rows=1000)
+    assert ivf.offsets[-1] == 2000
+    assert np.array_equal(np.sort(ivf.list_rows), np.arange(2000))
+
+def test_ivf_probe_finds_the_exact_nearest_neighbours_of_separated_clusters():
+    vectors = clustered_vectors(5000, 8)
+    ivf = build_ivf(vectors, lists=16, sample_rows=2000)
+    for query in vectors[:20]:
+        exact = set(np.argsort(-(vectors @ query))[:10])
+        rows = ivf.probe(query, 4)
+        assert exact <= set(rows)
+        assert len(rows) < len(vectors)
+
+def test_search_covers_rows_appended_since_the_ivf_build(index):
+    vectors = clustered_vectors(600, 6)
+    for start in range(0, 500, 50):
+        index.add_analysis("text", "model-a", "prompt", "1", analysis(50), vectors[start:start + 50])
+    index._build_ivf()
+    assert index._ivf.rows == 500
+    index.add_analysis("text", "model-a", "prompt", "1", analysis(100), vectors[500:])
+
+    hits = index._search(ArgumentSearchRequest(similar_to="x", limit=1), vectors[550])
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert index._load_ivf().rows == 500
+
+def test_filtered_search_only_returns_matching_arguments(index):
+    vectors = clustered_vectors(400, 4)
+    index.add_analysis("text", "model-a", "prompt", "1", analysis(200), vectors[:200])
+    index.add_analysis("text", "model-b", "prompt", "1", analysis(200), vectors[200:])
+    for build in (False, True):
+        if build:
+            index._build_ivf()
+        hits = index._search(ArgumentSearchRequest(similar_to="x", model_name="model-b", limit=10), vectors[0])
+        assert len(hits) == 10
+        assert {hit.model_name for hit in hits} == {"model-b"}
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.serialization import save_model_to_file
+from app.models.clients import ClientConfig, ClientsFile
+from app.services.client_manager import ClientManager, QuotaExceeded, TokenBucket, current_client
+from app.services.metrics_calback_handler import MetricsCallbackHandler
+
+CLIENT = ClientConfig(client_id="team", api_key_sha256="0" * 64, tokens_per_minute=6000, daily_token_quota=10000)
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / "clients.json")
+    save_model_to_file(path, ClientsFile(clients=[CLIENT]))
+    manager = ClientManager(path)
+    token = current_client.set(CLIENT)
+    yield manager
+    current_client.reset(token)
+
+def started(eval_count: int, prompt_eval_count: int) -> MetricsCallbackHandler:
+    callback = MetricsCallbackHandler()
+    callback.on_llm_start(None, [])
+    callback.metrics.update({'prompt_eval_count': prompt_eval_count, 'eval_count': eval_count})
+    return callback
+
+def test_token_bucket_refills_up_to_its_capacity():
+    bucket = TokenBucket(rate_per_second=100, capacity=1000)
+    bucket.consume(1500)
+    assert bucket.available() < 0
+    assert bucket.seconds_until_available(100) == pytest.approx(6.0, abs=0.05)
+    # More than the capacity is available once the bucket is full
+    assert bucket.seconds_until_available(5000) == pytest.approx(15.0, abs=0.05)
+    bucket.updated -= 60
+    assert bucket.available() == 1000
+    assert bucket.seconds_until_available(5000) == 0.0
+
+def test_generation_is_charged_what_it_used(manager):
+    with manager.metered(500, 2000, started(eval_count=300, prompt_eval_count=450)):
+        usage = manager.usage["team"]
+        assert usage.reserved_tokens == 2500
+        assert manager.buckets["team"].available() == pytest.approx(3500, abs=1)
+    assert usage.reserved_tokens == 0
+    assert usage.daily_tokens_used == 750
+    assert manager.buckets["team"].available() == pytest.approx(5250, abs=1)
+
+def test_generation_cancelled_before_it_started_is_refunded(manager):
+    with pytest.raises(asyncio.CancelledError):
+        with manager.metered(500, 2000, MetricsCallbackHandler()):
+            raise asyncio.CancelledError()
+    usage = manager.usage["team"]
+    assert usage.reserved_tokens == 0
+    assert usage.daily_tokens_used == 0
+    assert manager.buckets["team"].available() == pytest.approx(6000, abs=1)
+
+def test_concurrent_generations_cant_overdraw_the_rate_limit(manager):
+    with manager.metered(500, 2000, started(eval_count=100, prompt_eval_count=500)):
+        with manager.metered(500, 2000, started(eval_count=100, prompt_eval_count=500)):
+            with pytest.raises(QuotaExceeded) as error:
+                with manager.metered(500, 2000, MetricsCallbackHandler()):
+                    pass
+            assert error.value.retry_after > 0
+    assert manager.usage["team"].throttled == 1
+    assert manager.usage["team"].reserved_tokens == 0
+
+def test_reservations_count_against_the_daily_quota(manager):
+    manager.buckets.clear()
+    with manager.metered(4000, 2000, started(eval_count=100, prompt_eval_count=3000)):
+        with pytest.raises(QuotaExceeded, match="Daily token quota"):
+            with manager.metered(4000, 2000, MetricsCallbackHandler()):
+                pass
+    # Once the first generation settles, only what it used counts
+    with manager.metered(4000, 2000, MetricsCallbackHandler()):
+        pass
+    assert manager.usage["team"].daily_tokens_used == 3100
@@ -0,0 +1,99 @@
+import asyncio
+import random
+
+import pytest
+
+from app.models.analysis import AnalysisResponse, ApplicationType
+from app.models.argument_analysis import ArgumentAnalysisResult
+from app.models.documents import DocumentAnalysisRequest
+from app.services.argument_analyzer import argument_analyzer
+from app.services.document_sessions import DocumentSessionManager, segment_text
+from app.services.prompt_manager import prompt_manager
+
+MIN_CHARS = 400
+WORDS = "argument claim evidence study result policy city cost benefit risk data survey growth health energy".split()
+
+def paragraph(seed: int, length: int = 300) -> str:
+    rng = random.Random(seed)
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return f"{seed}. " + " ".join(words) + "."
+
+def document(paragraphs):
+    return "\n\n".join(paragraphs)
+
+def reused(before, after) -> int:
+    """Number of segments of the new revision that are unchanged from the previous one."""
+    previous = set(segment_text(document(before), MIN_CHARS))
+    return sum(segment in previous for segment in segment_text(document(after), MIN_CHARS))
+
+PARAGRAPHS = [paragraph(seed) for seed in range(40)]
+SEGMENTS = len(segment_text(document(PARAGRAPHS), MIN_CHARS))
+
+def test_short_paragraphs_are_joined():
+    assert 1 < SEGMENTS < len(PARAGRAPHS)
+    heading = "Introduction"
+    segments = segment_text(document([heading, PARAGRAPHS[0]]), MIN_CHARS)
+    assert segments[0].startswith(heading + "\n\n")
+
+def test_long_paragraphs_are_segments_of_their_own():
+    paragraphs = [paragraph(seed, length=500) for seed in range(5)]
+    assert segment_text(document(paragraphs), MIN_CHARS) == paragraphs
+
+def test_insert_at_top_only_changes_the_first_segment():
+    inserted = [paragraph(1000, length=150)] + PARAGRAPHS
+    assert reused(PARAGRAPHS, inserted) >= SEGMENTS - 1
+
+def test_insert_in_the_middle_only_changes_nearby_segments():
+    inserted = PARAGRAPHS[:20] + [paragraph(1000)] + PARAGRAPHS[20:]
+    assert reused(PARAGRAPHS, inserted) >= SEGMENTS - 2
+
+def test_delete_only_changes_nearby_segments():
+    deleted = PARAGRAPHS[:20] + PARAGRAPHS[21:]
+    assert reused(PARAGRAPHS, deleted) >= SEGMENTS - 2
+
+def test_edit_only_changes_nearby_segments():
+    edited = list(PARAGRAPHS)
+    edited[20] = edited[20][:150]
+    assert reused(PARAGRAPHS, edited) >= SEGMENTS - 2
+
+def test_unchanged_document_reuses_every_segment():
+    assert reused(PARAGRAPHS, PARAGRAPHS) == SEGMENTS
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    result = ArgumentAnalysisResult(arguments=[], overall_assessment="ok", credibility_score=0.5, argument_count=0, well_supported_arguments=0)
+
+    async def analyze_text(text, model_name, prompt_name=None, generation_params=None):
+        await asyncio.sleep(0.01)
+        return AnalysisResponse(model_used=model_name, success=True, application=ApplicationType.ARGUMENT_ANALYSIS, timestamp=0.0, result=result)
+
+    monkeypatch.setattr(argument_analyzer, "analyze_text", analyze_text)
+    monkeypatch.setattr(argument_analyzer, "analysis_key", lambda *args: "key")
+    monkeypatch.setattr(prompt_manager, "get_default_prompt_name", lambda application: "prompt")
+    monkeypatch.setattr(prompt_manager, "get_prompt", lambda name: object())
+    return DocumentSessionManager(str(tmp_path), cache_size=2)
+
+def request(session_id=None, paragraphs=PARAGRAPHS[:5]) -> DocumentAnalysisRequest:
+    return DocumentAnalysisRequest(text=document(paragraphs), session_id=session_id, model_name="model")
+
+@pytest.mark.asyncio
+async def test_sessions_in_memory_are_bounded_and_reloaded_from_disk(sessions):
+    session_ids = [(await sessions.analyze(request(), "client")).session_id for _ in range(5)]
+    assert list(sessions.sessions) == session_ids[-2:]
+    assert not sessions.locks and not sessions.lock_users
+
+    response = await sessions.analyze(request(session_ids[0]), "client")
+    assert response.revision == 2
+    assert response.segments_reused == response.segments_total
+
+@pytest.mark.asyncio
+async def test_delete_waits_for_the_analysis_in_progress(sessions):
+    session_id = (await sessions.analyze(request(), "client")).session_id
+    analysis = asyncio.create_task(sessions.analyze(request(session_id, PARAGRAPHS[5:10]), "client"))
+    await asyncio.sleep(0)
+    assert await sessions.delete_session(session_id, "client")
+    await analysis
+    assert sessions.get_session(session_id, "client") is None
+    assert not sessions.locks and not sessions.lock_users
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.services.generation_scheduler import GenerationScheduler
+
+async def occupy(scheduler: GenerationScheduler):
+    """Take a slot and return the context to release it with."""
+    slot = scheduler.slot("holder")
+    await slot.__aenter__()
+    return slot
+
+async def wait_queued(scheduler: GenerationScheduler, count: int):
+    while scheduler.waiting < count:
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_slots_go_by_weighted_fair_queuing_across_clients():
+    scheduler = GenerationScheduler(max_concurrent=1)
+    holder = await occupy(scheduler)
+    order = []
+
+    async def generate(name: str, client_id: str, weight: float):
+        async with scheduler.slot(client_id, weight, cost=100):
+            order.append(name)
+
+    # a submits its whole batch first, b has twice the weight
+    tasks = [asyncio.create_task(generate(f"a{i}", "a", 1.0)) for i in range(3)]
+    await wait_queued(scheduler, 3)
+    tasks += [asyncio.create_task(generate(f"b{i}", "b", 2.0)) for i in range(4)]
+    await wait_queued(scheduler, 7)
+
+    await holder.__aexit__(None, None, None)
+    await asyncio.gather(*tasks)
+    assert order == ["b0", "a0", "b1", "b2", "a1", "b3", "a2"]
+    assert scheduler.active == 0 and scheduler.waiting == 0
+
+@pytest.mark.asyncio
+async def test_client_that_just_used_the_model_waits_behind_one_that_didnt():
+    scheduler = GenerationScheduler(max_concurrent=1)
+    for _ in range(5):
+        async with scheduler.slot("a", cost=100):
+            pass
+    holder = await occupy(scheduler)
+    order = []
+
+    async def generate(client_id: str):
+        async with scheduler.slot(client_id, cost=100):
+            order.append(client_id)
+
+    tasks = [asyncio.create_task(generate("b"))]
+    await wait_queued(scheduler, 1)
+    tasks.append(asyncio.create_task(generate("a")))
+    await wait_queued(scheduler, 2)
+    await holder.__aexit__(None, None, None)
+    await asyncio.gather(*tasks)
+    assert order == ["b", "a"]
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    scheduler = GenerationScheduler(max_concurrent=1)
+    holder = await occupy(scheduler)
+    ran = []
+
+    async def generate(name: str):
+        async with scheduler.slot(name):
+            ran.append(name)
+
+    first = asyncio.create_task(generate("first"))
+    await wait_queued(scheduler, 1)
+    second = asyncio.create_task(generate("second"))
+    await wait_queued(scheduler, 2)
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    await holder.__aexit__(None, None, None)
+    await second
+    assert ran == ["second"]
+    assert scheduler.active == 0 and scheduler.waiting == 0
+
+@pytest.mark.asyncio
+async def test_slot_handed_to_a_waiter_cancelled_before_it_resumes_is_passed_on():
+    scheduler = GenerationScheduler(max_concurrent=1)
+    holder = await occupy(scheduler)
+    ran = []
+
+    async def generate(name: str):
+        async with scheduler.slot(name):
+            ran.append(name)
+
+    first = asyncio.create_task(generate("first"))
+    await wait_queued(scheduler, 1)
+    second = asyncio.create_task(generate("second"))
+    await wait_queued(scheduler, 2)
+
+    # Releasing hands the slot to first, which is cancelled before it gets to run
+    await holder.__aexit__(None, None, None)
+    first.cancel()
+    await asyncio.gather(first, second, return_exceptions=True)
+    assert first.cancelled()
+    assert ran == ["second"]
+    assert scheduler.active == 0 and scheduler.waiting == 0
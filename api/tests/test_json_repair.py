@@ -0,0 +1,89 @@
+from typing import List
+
+import orjson
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from app.services.argument_analyzer import argument_analyzer
+from app.services.entity_analyzer import entity_analyzer
+from app.services.json_repair import clamp_out_of_range, close_json, format_errors, repair_candidates
+
+class Score(BaseModel):
+    value: float = Field(..., ge=0.0, le=1.0)
+
+class Scores(BaseModel):
+    overall: float = Field(..., ge=0.0, le=1.0)
+    count: int = Field(..., ge=0)
+    items: List[Score]
+
+def first_candidate(response: str):
+    return next(repair_candidates(response), None)
+
+def test_close_json_drops_trailing_commas():
+    assert orjson.loads(close_json('{"a": [1, 2, ], "b": {"c": 3,},}')) == {"a": [1, 2], "b": {"c": 3}}
+
+def test_close_json_ignores_text_after_the_object():
+    assert close_json('{"a": "}"} I hope this helps {') == '{"a": "}"}'
+
+def test_close_json_closes_a_string_cut_off_mid_value():
+    assert orjson.loads(close_json('{"a": ["x", "hel')) == {"a": ["x", "hel"]}
+
+def test_close_json_drops_a_dangling_escape():
+    assert orjson.loads(close_json('{"a": "line\\')) == {"a": "line"}
+
+def test_truncation_mid_key_drops_the_incomplete_member():
+    assert first_candidate('{"a": 1, "b": [1, 2], "ke') == {"a": 1, "b": [1, 2]}
+
+def test_truncation_after_a_key_drops_the_incomplete_member():
+    assert first_candidate('{"a": 1, "key": ') == {"a": 1}
+
+def test_truncation_mid_number():
+    assert first_candidate('{"a": 1, "b": 12') == {"a": 1, "b": 12}
+    assert first_candidate('{"a": 1, "b": 1.') == {"a": 1}
+    assert first_candidate('{"a": 1, "b": -') == {"a": 1}
+
+def test_candidates_skip_chatter_before_the_object():
+    assert first_candidate('Here is the analysis:\n{"a": [1, 2') == {"a": [1, 2]}
+
+def test_no_candidates_without_an_object():
+    assert list(repair_candidates("I cannot do that")) == []
+
+def test_clamp_out_of_range_clamps_nested_values_to_their_bounds():
+    data = {"overall": 1.7, "count": -2, "items": [{"value": 0.5}, {"value": -0.3}]}
+    with pytest.raises(ValidationError) as error:
+        Scores.model_validate(data)
+    assert clamp_out_of_range(data, error.value)
+    assert data == {"overall": 1.0, "count": 0, "items": [{"value": 0.5}, {"value": 0.0}]}
+    Scores.model_validate(data)
+
+def test_clamp_out_of_range_leaves_other_errors():
+    data = {"overall": "high", "count": 1, "items": []}
+    with pytest.raises(ValidationError) as error:
+        Scores.model_validate(data)
+    assert not clamp_out_of_range(data, error.value)
+    assert format_errors(error.value) == ["overall: Input should be a valid number, unable to parse string as a number"]
+
+ARGUMENT = '{"argument": "A", "supporting_claims": ["c"], "qualifiers": [], "model_assessment": "ok", "confidence_score": 1.4}'
+
+def test_repair_locally_recomputes_counts_and_clamps_scores():
+    # The third argument is cut off, so it is dropped and the counts must follow
+    response = (
+        '{"overall_assessment": "fine", "credibility_score": 1.7, "argument_count": 5, "well_supported_arguments": 4, '
+        '"arguments": [' + ARGUMENT + ', ' + ARGUMENT + ', {"argument": "B", "supp'
+    )
+    result, errors = argument_analyzer._repair_locally(response)
+    assert errors == []
+    assert result.argument_count == 2
+    assert result.well_supported_arguments == 2
+    assert result.credibility_score == 1.0
+    assert [argument.confidence_score for argument in result.arguments] == [1.0, 1.0]
+
+def test_repair_locally_recomputes_entity_count():
+    result, errors = entity_analyzer._repair_locally('{"entities": [{"name": "X", "entity_type": "org"}], "entity_count": 7,')
+    assert errors == []
+    assert result.entity_count == 1
+
+def test_repair_locally_reports_the_remaining_errors():
+    result, errors = argument_analyzer._repair_locally('{"arguments": [], "credibility_score": 0.5}')
+    assert result is None
+    assert any(error.startswith("overall_assessment") for error in errors)
@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+class Work:
+    """Work that publishes chunks when told to and records whether it was cancelled."""
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.flight = None
+
+    async def __call__(self, flight):
+        self.calls += 1
+        self.flight = flight
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+async def collect(stream):
+    return [event async for event in stream]
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_the_work():
+    flights, work = SingleFlight(), Work()
+    calls = [asyncio.create_task(flights.run("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    work.release.set()
+    assert await asyncio.gather(*calls) == [("result", False), ("result", True), ("result", True)]
+    assert work.calls == 1
+    assert not flights.flights
+
+@pytest.mark.asyncio
+async def test_follower_gets_the_result_when_the_leader_leaves():
+    flights, work = SingleFlight(), Work()
+    leader = asyncio.create_task(flights.run("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.run("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    assert leader.cancelled()
+    assert not work.cancelled
+
+    work.release.set()
+    assert await follower == ("result", True)
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_every_subscriber_leaves():
+    flights, work = SingleFlight(), Work()
+    calls = [asyncio.create_task(flights.run("key", work)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for call in calls:
+        call.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert work.cancelled
+    assert not flights.flights
+
+    # A later call starts fresh work instead of attaching to the cancelled one
+    fresh = Work("fresh")
+    fresh.release.set()
+    assert await flights.run("key", fresh) == ("fresh", False)
+
+@pytest.mark.asyncio
+async def test_late_stream_subscriber_gets_earlier_chunks_then_live_ones():
+    flights, work = SingleFlight(), Work()
+    first = asyncio.create_task(collect(flights.stream("key", work)))
+    await work.started.wait()
+    work.flight.publish("a")
+    work.flight.publish("b")
+
+    second = asyncio.create_task(collect(flights.stream("key", work)))
+    await asyncio.sleep(0)
+    work.flight.publish("c")
+    work.release.set()
+
+    chunks = [("chunk", "a"), ("chunk", "b"), ("chunk", "c")]
+    assert await first == chunks + [("result", ("result", False))]
+    assert await second == chunks + [("result", ("result", True))]
+    assert work.flight.listeners == []
+
+@pytest.mark.asyncio
+async def test_stream_subscriber_leaving_doesnt_cancel_a_run_subscriber():
+    flights, work = SingleFlight(), Work()
+    stream = flights.stream("key", work)
+    first_chunk = asyncio.create_task(stream.__anext__())
+    await work.started.wait()
+    runner = asyncio.create_task(flights.run("key", work))
+    await asyncio.sleep(0)
+    work.flight.publish("a")
+    assert await first_chunk == ("chunk", "a")
+
+    await stream.aclose()
+    assert work.flight.listeners == []
+    work.release.set()
+    assert await runner == ("result", True)
+    assert not work.cancelled
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_by_every_subscriber():
+    flights = SingleFlight()
+
+    async def fail(flight):
+        await asyncio.sleep(0)
+        raise ValueError("failed")
+
+    calls = [asyncio.create_task(flights.run("key", fail)) for _ in range(2)]
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert [str(result) for result in results] == ["failed", "failed"]
+
+@pytest.mark.asyncio
+async def test_subscribers_retry_errors_that_only_concern_the_leader():
+    flights = SingleFlight()
+    caller = contextvars.ContextVar("caller")
+
+    class OverQuota(Exception):
+        pass
+
+    async def work(flight):
+        await asyncio.sleep(0.01)
+        if caller.get() == "a":
+            raise OverQuota()
+        return caller.get()
+
+    async def call(name: str, stream: bool = False):
+        caller.set(name)
+        if stream:
+            return await collect(flights.stream("key", work, retry_on=(OverQuota,)))
+        return await flights.run("key", work, retry_on=(OverQuota,))
+
+    leader = asyncio.create_task(call("a"))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(call("b")), asyncio.create_task(call("c")), asyncio.create_task(call("d", stream=True))]
+    with pytest.raises(OverQuota):
+        await leader
+    # The first follower to retry runs the work under its own quota, the others attach to it
+    b, c, d = await asyncio.gather(*followers)
+    results = [b, c, d[-1][1]]
+    assert len({result for result, _ in results}) == 1 and results[0][0] != "a"
+    assert [coalesced for _, coalesced in results].count(False) == 1
@@ -0,0 +1,32 @@
+from app.services.token_estimator import TokenEstimator
+
+BUCKETS = [2048, 4096, 8192, 16384]
+
+def test_response_reservation_is_max_tokens_until_enough_responses_are_observed():
+    estimator = TokenEstimator(BUCKETS)
+    for _ in range(TokenEstimator.MIN_RESPONSE_SAMPLES - 1):
+        estimator.record_response("model", "prompt", 300)
+    assert estimator.expected_response_tokens("model", "prompt", 2048) == 2048
+    assert estimator.select_context_bucket(600, estimator.expected_response_tokens("model", "prompt", 2048)) == 4096
+
+def test_short_responses_fit_the_smallest_bucket():
+    estimator = TokenEstimator(BUCKETS)
+    for eval_tokens in range(200, 400, 10):
+        estimator.record_response("model", "prompt", eval_tokens)
+    expected = estimator.expected_response_tokens("model", "prompt", 2048)
+    assert 390 <= expected <= 440
+    assert estimator.select_context_bucket(600, expected) == 2048
+    # Other prompts of the same model keep the full budget
+    assert estimator.expected_response_tokens("model", "other", 2048) == 2048
+
+def test_response_reservation_is_capped_at_max_tokens():
+    estimator = TokenEstimator(BUCKETS)
+    for _ in range(TokenEstimator.MIN_RESPONSE_SAMPLES):
+        estimator.record_response("model", "prompt", 1000)
+    assert estimator.expected_response_tokens("model", "prompt", 500) == 500
+    assert estimator.expected_response_tokens("model", "prompt", None) == 1100
+
+def test_requests_larger_than_every_bucket_get_the_configured_context_length():
+    estimator = TokenEstimator(BUCKETS)
+    assert estimator.select_context_bucket(20000, 500) == 16384
+    assert estimator.select_context_bucket(20000, 500, max_context=32768) == 32768